@@ -1,90 +1,56 @@
-import random
 import math
 import matplotlib.pyplot as plt
 import numpy as np
 import time
-from tqdm import tqdm
+
+from planner.benchmark import run_benchmark
+from planner.collision import EdgeCache, obstacle_grid, segment_collides
+from planner.sampling import Sampler
+from planner.spatial_index import GridIndex
+from planner.stats import PlanStats, phase_timer
+from planner.tree import Tree
 
 # ----------------------------
-#  Node class and basic utils
+#  Basic utils
 # ----------------------------
-class Node:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.parent = None
-        self.cost = 0.0  # Used only by RRT* to store cost from start
+# The tree is stored in a `Tree` (planner/tree.py): nodes are integer indices
+# into its coordinate, parent and cost arrays.
 
 def distance(p1, p2):
     return math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2 + (p1[2]-p2[2])**2)
 
-def steer(from_node, to_point, expand_dist):
+def steer(tree, from_index, to_point, expand_dist):
     """
-    Steer from `from_node` towards `to_point` by `expand_dist`.
+    Steer from node `from_index` towards `to_point` by `expand_dist`.
+    Returns the new point; the caller decides whether to add it to the tree.
     """
-    dx = to_point[0] - from_node.x
-    dy = to_point[1] - from_node.y
-    dz = to_point[2] - from_node.z
+    fx, fy, fz = tree.point(from_index)
+    dx = to_point[0] - fx
+    dy = to_point[1] - fy
+    dz = to_point[2] - fz
     dist = math.sqrt(dx*dx + dy*dy + dz*dz)
     if dist < 1e-9:  # Avoid division by zero if points are extremely close
-        return Node(to_point[0], to_point[1], to_point[2])
-    new_x = from_node.x + expand_dist * dx / dist
-    new_y = from_node.y + expand_dist * dy / dist
-    new_z = from_node.z + expand_dist * dz / dist
-    return Node(new_x, new_y, new_z)
+        return (to_point[0], to_point[1], to_point[2])
+    new_x = fx + expand_dist * dx / dist
+    new_y = fy + expand_dist * dy / dist
+    new_z = fz + expand_dist * dz / dist
+    return (new_x, new_y, new_z)
 
-def check_collision(node_from, node_to, obstacles):
-    """
-    Check if the line segment from node_from to node_to intersects any obstacles.
-    Obstacles are axis-aligned 3D boxes defined as (x_min, x_max, y_min, y_max, z_min, z_max).
+def check_collision(p_from, p_to, obstacles):
     """
-    seg_dist = distance((node_from.x, node_from.y, node_from.z), 
-                        (node_to.x, node_to.y, node_to.z))
-    # Step size in collision checking
-    step_size = 0.5  
-    steps = int(seg_dist / step_size) + 1
-
-    for i in range(steps):
-        t = i / float(steps)
-        x = node_from.x + t * (node_to.x - node_from.x)
-        y = node_from.y + t * (node_to.y - node_from.y)
-        z = node_from.z + t * (node_to.z - node_from.z)
-        
-        # Check each obstacle
-        for (ox_min, ox_max, oy_min, oy_max, oz_min, oz_max) in obstacles:
-            if (ox_min <= x <= ox_max) and (oy_min <= y <= oy_max) and (oz_min <= z <= oz_max):
-                return False
-    return True
-
-def get_nearest_node_index(node_list, rnd_point):
-    distances = [(node.x - rnd_point[0])**2 + (node.y - rnd_point[1])**2 + (node.z - rnd_point[2])**2
-                 for node in node_list]
-    min_index = distances.index(min(distances))
-    return min_index
-
-def generate_random_point(min_x, max_x, min_y, max_y, min_z, max_z, goal_sample_rate, goal):
+    Check if the line segment from p_from to p_to is free of obstacles.
+    Obstacles are axis-aligned 3D boxes defined as (x_min, x_max, y_min, y_max, z_min, z_max),
+    either as a list of tuples, an (N, 6) array or a prebuilt ObstacleGrid (see planner/collision.py).
+    The test is exact: the whole segment is checked, not samples along it.
     """
-    With probability goal_sample_rate, return the goal. Otherwise, random point.
-    """
-    if random.random() < goal_sample_rate:
-        return (goal[0], goal[1], goal[2])
-    else:
-        rx = random.uniform(min_x, max_x)
-        ry = random.uniform(min_y, max_y)
-        rz = random.uniform(min_z, max_z)
-        return (rx, ry, rz)
+    return not segment_collides(p_from, p_to, obstacles)
 
-def backtrace_path(goal_node):
+def backtrace_path(tree, index, goal):
     """
-    Return path from start to goal by backtracking parent pointers of the goal_node.
+    Return path from start to goal by following the parent indices of node `index`.
     """
-    path = []
-    node = goal_node
-    while node is not None:
-        path.append((node.x, node.y, node.z))
-        node = node.parent
-    path.reverse()
+    path = [tree.point(i) for i in tree.path_to(index)]
+    path.append((goal[0], goal[1], goal[2]))
     return path
 
 # ----------------
@@ -92,124 +58,238 @@ def backtrace_path(goal_node):
 # ----------------
 def rrt_planning(start, goal, obstacles, 
                  min_x, max_x, min_y, max_y, min_z, max_z,
-                 expand_dist=1.0, goal_sample_rate=0.05, max_iter=1000, goal_tolerance=1.0):
+                 expand_dist=1.0, goal_sample_rate=0.05, max_iter=1000, goal_tolerance=1.0,
+                 spatial_index=GridIndex, seed=None, stats=None, profile=False):
     """
     Basic RRT in 3D.
+    `spatial_index` is the index class used for nearest-node queries.
+    `obstacles` may also be a prebuilt ObstacleGrid to reuse it across calls.
+    `seed` seeds the run's own sample stream (int, SeedSequence or Generator).
+    Pass a planner.stats.PlanStats as `stats` to get the iteration count and tree size.
+    With `profile=True` every phase is timed and (path, stats) is returned.
     """
-    start_node = Node(start[0], start[1], start[2])
-    goal_node = Node(goal[0], goal[1], goal[2])
-    node_list = [start_node]
-
+    if profile:
+        stats = stats if stats is not None else PlanStats()
+        stats.start()
+    tree = Tree(start, min_x, max_x, min_y, max_y, min_z, max_z, spatial_index=spatial_index)
+    sampler = Sampler(min_x, max_x, min_y, max_y, min_z, max_z, goal, goal_sample_rate, seed)
+    obstacles = obstacle_grid(obstacles, min_x, max_x, min_y, max_y, min_z, max_z)
+
+    # Phases are called through these names; profiling wraps them in timers.
+    timed = phase_timer(stats)
+    sample = timed('sample', sampler.sample)
+    nearest = timed('nearest', tree.nearest)
+    steer_ = timed('steer', steer)
+    collision_free = timed('collision', check_collision)
+
+    path = None
     for _ in range(max_iter):
-        rnd_point = generate_random_point(
-            min_x, max_x, min_y, max_y, min_z, max_z, goal_sample_rate, goal
-        )
-        nearest_index = get_nearest_node_index(node_list, rnd_point)
-        nearest_node = node_list[nearest_index]
+        rnd_point = sample()
+        nearest_index = nearest(rnd_point)
 
-        new_node = steer(nearest_node, rnd_point, expand_dist)
+        new_point = steer_(tree, nearest_index, rnd_point, expand_dist)
 
-        if check_collision(nearest_node, new_node, obstacles):
-            new_node.parent = nearest_node
-            node_list.append(new_node)
+        if collision_free(tree.point(nearest_index), new_point, obstacles):
+            new_index = tree.add(new_point, nearest_index)
 
             # Check if within tolerance
-            if distance((new_node.x, new_node.y, new_node.z),
-                        (goal_node.x, goal_node.y, goal_node.z)) < goal_tolerance:
-                goal_node.parent = new_node
-                return backtrace_path(goal_node)
-
-    return None
+            if distance(new_point, goal) < goal_tolerance:
+                path = backtrace_path(tree, new_index, goal)
+                break
+
+    if stats is not None:
+        if path is not None:
+            stats.solved(sampler)
+        if profile:
+            stats.collision_checks += stats.phases['collision'][0]
+        stats.finish(sampler, tree)
+    return (path, stats) if profile else path
 
 # ----------------
 #   RRT*
 # ----------------
+class BestPath:
+    """
+    Best solution of an anytime RRT* run so far. The planner replaces
+    `solution`, a (path, cost) tuple, whenever it finds a shorter path (it
+    never mutates it), so the object can be read at any point, also from
+    another thread; read `solution` once to get a path and its own cost.
+    """
+    def __init__(self):
+        self.solution = (None, math.inf)
+        self.iteration = None  # iteration at which `path` was found
+        self.improvements = 0
+
+    @property
+    def path(self):
+        return self.solution[0]
+
+    @property
+    def cost(self):
+        return self.solution[1]
+
 def rrt_star_planning(
     start, goal, obstacles, 
     min_x, max_x, min_y, max_y, min_z, max_z,
     expand_dist=1.0, goal_sample_rate=0.05, max_iter=1000, goal_tolerance=1.0,
-    max_radius=2.0):
+    max_radius=2.0, spatial_index=GridIndex, edge_cache=None, seed=None,
+    anytime=False, max_time=None, best_path=None, refresh_every=100, stats=None, profile=False):
     """
     RRT* in 3D.
+    `spatial_index` is the index class used for nearest-node queries.
+    `obstacles` may also be a prebuilt ObstacleGrid to reuse it across calls.
+    Edge collision results are cached per node pair so no edge is tested twice;
+    pass a fresh `edge_cache` (planner.collision.EdgeCache) to read its hit/miss counters.
+    `seed` seeds the run's own sample stream (int, SeedSequence or Generator).
+    Pass a planner.stats.PlanStats as `stats` to get the iteration count and tree size.
+    With `profile=True` every phase is timed and (path, stats) is returned.
+
+    By default the first node within goal_tolerance ends the search. With
+    `anytime=True` the search keeps going until max_iter iterations or
+    `max_time` seconds are used up and returns the best path found. Once a
+    solution exists, samples are only drawn from the ellipsoid of points
+    that could still shorten it (informed RRT*). Pass a BestPath as
+    `best_path` to read the current best solution while the search runs;
+    goal-side costs are re-checked every `refresh_every` added nodes to pick
+    up improvements made by rewiring.
     """
-    start_node = Node(start[0], start[1], start[2])
-    goal_node = Node(goal[0], goal[1], goal[2])
-    start_node.cost = 0.0
-    node_list = [start_node]
-
-    for _ in range(max_iter):
-        rnd_point = generate_random_point(
-            min_x, max_x, min_y, max_y, min_z, max_z, goal_sample_rate, goal
-        )
+    if profile:
+        stats = stats if stats is not None else PlanStats()
+        stats.start()
+    tree = Tree(start, min_x, max_x, min_y, max_y, min_z, max_z, spatial_index=spatial_index)
+    sampler = Sampler(min_x, max_x, min_y, max_y, min_z, max_z, goal, goal_sample_rate, seed)
+    obstacles = obstacle_grid(obstacles, min_x, max_x, min_y, max_y, min_z, max_z)
+    cache = edge_cache if edge_cache is not None else EdgeCache()
+    cache_misses = cache.misses
+    best = best_path if best_path is not None else BestPath()
+    goal_nodes = []
+    deadline = None if max_time is None else time.perf_counter() + max_time
+
+    # Phases are called through these names; profiling wraps them in timers.
+    timed = phase_timer(stats)
+    sample = timed('sample', sampler.sample)
+    nearest = timed('nearest', tree.nearest)
+    steer_ = timed('steer', steer)
+    collision_free = timed('collision', check_collision)
+    within = timed('near', tree.within)
+    add = timed('add', tree.add)
+    choose_parent_ = timed('choose_parent', choose_parent)
+    rewire_ = timed('rewire', rewire)
+    update_best_path_ = timed('update_best', update_best_path)
+
+    path = None
+    for iteration in range(max_iter):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        rnd_point = sample()
 
         # 1) Find nearest node
-        nearest_index = get_nearest_node_index(node_list, rnd_point)
-        nearest_node = node_list[nearest_index]
+        nearest_index = nearest(rnd_point)
+        nearest_point = tree.point(nearest_index)
 
         # 2) Steer
-        new_node = steer(nearest_node, rnd_point, expand_dist)
+        new_point = steer_(tree, nearest_index, rnd_point, expand_dist)
 
-        # 3) Check collision from nearest_node to new_node
-        if not check_collision(nearest_node, new_node, obstacles):
+        # 3) Check collision from nearest node to new point
+        if not collision_free(nearest_point, new_point, obstacles):
             continue
+        # Index the new node will get; only cache edges of nodes that are added
+        new_index = len(tree)
+        cache.put(nearest_index, new_index, True)
 
         # 4) Find nearby nodes within a radius
         #    A common formula: r = gamma * (log(n)/n)^(1/d), but we can keep it simpler.
         #    Here we combine that with max_radius as an upper bound.
-        n = len(node_list)
+        n = len(tree)
         d = 3.0  # 3D
         gamma = 1.0  # Some constant
         radius = min(max_radius, gamma * (math.log(n) / n)**(1.0/d) * expand_dist + expand_dist)
 
-        nearby_nodes = []
-        for node in node_list:
-            if distance((node.x, node.y, node.z), (new_node.x, new_node.y, new_node.z)) < radius:
-                nearby_nodes.append(node)
-
-        # 5) Choose the best parent = minimal cost
-        best_node = nearest_node
-        best_cost = nearest_node.cost + distance(
-            (nearest_node.x, nearest_node.y, nearest_node.z),
-            (new_node.x, new_node.y, new_node.z)
-        )
-
-        for near_node in nearby_nodes:
-            # Check if collision-free from near_node to new_node
-            if check_collision(near_node, new_node, obstacles):
-                cost = near_node.cost + distance(
-                    (near_node.x, near_node.y, near_node.z),
-                    (new_node.x, new_node.y, new_node.z)
-                )
-                if cost < best_cost:
-                    best_cost = cost
-                    best_node = near_node
-
-        # Attach new_node to best_node
-        new_node.parent = best_node
-        new_node.cost = best_cost
-        node_list.append(new_node)
-
-        # 6) Rewire: check if we can improve cost of nearby_nodes by going through new_node
-        for near_node in nearby_nodes:
-            if near_node == best_node:
-                continue
-            new_cost = new_node.cost + distance(
-                (new_node.x, new_node.y, new_node.z),
-                (near_node.x, near_node.y, near_node.z)
-            )
-            # If cheaper and collision-free, then rewire
-            if new_cost < near_node.cost:
-                if check_collision(new_node, near_node, obstacles):
-                    near_node.parent = new_node
-                    near_node.cost = new_cost
+        nearby = within(new_point, radius)
+        near_xyz = tree.xyz[nearby]
+        near_dist = np.sqrt(((near_xyz - new_point)**2).sum(axis=1))
 
-        # 7) Check goal tolerance
-        if distance((new_node.x, new_node.y, new_node.z), (goal_node.x, goal_node.y, goal_node.z)) < goal_tolerance:
-            goal_node.parent = new_node
-            goal_node.cost = new_node.cost
-            return backtrace_path(goal_node)
+        # 5) Choose the best parent and attach the new node to it
+        best_index, best_cost = choose_parent_(tree, new_index, new_point, nearest_index, nearest_point,
+                                               nearby, near_xyz, near_dist, cache, obstacles)
+        add(new_point, best_index, best_cost)
 
-    return None
+        # 6) Rewire nearby nodes through the new node
+        rewire_(tree, new_index, new_point, best_index, best_cost,
+                nearby, near_xyz, near_dist, cache, obstacles)
+
+        # 7) Check goal tolerance
+        reached = distance(new_point, goal) < goal_tolerance
+        if reached and stats is not None:
+            stats.solved(sampler)
+        if reached and not anytime:
+            path = backtrace_path(tree, new_index, goal)
+            break
+        if reached:
+            goal_nodes.append(new_index)
+        if goal_nodes and (reached or len(tree) % refresh_every == 0):
+            update_best_path_(tree, goal_nodes, goal, best, iteration, sampler, start)
+
+    if anytime:
+        path = best.path
+    if stats is not None:
+        if profile:
+            stats.collision_checks += stats.phases['collision'][0] + cache.misses - cache_misses
+        stats.finish(sampler, tree)
+    return (path, stats) if profile else path
+
+def choose_parent(tree, new_index, new_point, nearest_index, nearest_point,
+                  nearby, near_xyz, near_dist, cache, obstacles):
+    """
+    Cheapest collision-free parent for the new node among the nearest node
+    and the `nearby` nodes, evaluated over the whole near set at once.
+    Only neighbours that would beat the nearest node need a collision check.
+    Returns (parent index, cost through it).
+    """
+    best_index = nearest_index
+    best_cost = float(tree.cost[nearest_index]) + distance(nearest_point, new_point)
+
+    through_cost = tree.cost[nearby] + near_dist
+    better = np.flatnonzero(through_cost < best_cost)
+    if len(better):
+        better = better[cache.segments_free(new_index, new_point, nearby[better], near_xyz[better], obstacles)]
+        if len(better):
+            k = better[np.argmin(through_cost[better])]
+            best_index = int(nearby[k])
+            best_cost = float(through_cost[k])
+    return best_index, best_cost
+
+def rewire(tree, new_index, new_point, best_index, best_cost,
+           nearby, near_xyz, near_dist, cache, obstacles):
+    """
+    Re-parent the nearby nodes that get cheaper through the new node and can
+    see it. The cost drop is passed on to their subtrees, which may already
+    make a later candidate cheaper.
+    """
+    rewire_cost = best_cost + near_dist
+    improve = np.flatnonzero((rewire_cost < tree.cost[nearby]) & (nearby != best_index))
+    if len(improve):
+        improve = improve[cache.segments_free(new_index, new_point, nearby[improve], near_xyz[improve], obstacles)]
+        for node, cost in zip(nearby[improve].tolist(), rewire_cost[improve].tolist()):
+            if cost < tree.cost[node]:
+                tree.reparent(node, new_index, cost)
+
+def update_best_path(tree, goal_nodes, goal, best, iteration, sampler, start):
+    """
+    Pick the cheapest node within goal tolerance and, if it beats `best`,
+    publish its path and shrink the informed sampling region.
+    """
+    nodes = np.array(goal_nodes)
+    total = tree.cost[nodes] + np.sqrt(((tree.xyz[nodes] - goal)**2).sum(axis=1))
+    k = int(np.argmin(total))
+    if total[k] >= best.cost:
+        return
+    index = int(nodes[k])
+    # path and cost are published together, as one tuple
+    best.solution = (backtrace_path(tree, index, goal), float(total[k]))
+    best.iteration = iteration
+    best.improvements += 1
+    sampler.focus(start, goal, best.cost)
 
 # -------------------------------------------------------
 #   Plotting and Comparison
@@ -426,53 +506,35 @@ if __name__ == "__main__":
     '''
     
     num_runs = 10000  # Number of times to run each algorithm
-    
-    # Storage for path lengths and computation times
-    rrt_lengths = []
-    rrt_times = []
-    rrt_star_lengths = []
-    rrt_star_times = []
-    
-    # Perform multiple runs with a progress bar
-    for _ in tqdm(range(num_runs), desc="Running RRT and RRT* simulations"):
-        # Measure time for RRT
-        start_time = time.time()
-        rrt_path = rrt_planning(
-            start=start_coord,
-            goal=end_coord,
-            obstacles=obstacles,
-            min_x=min_x, max_x=max_x,
-            min_y=min_y, max_y=max_y,
-            min_z=min_z, max_z=max_z,
-            expand_dist=0.5,
-            goal_sample_rate=0.01,
-            max_iter=1000,
-            goal_tolerance=1.0
-        )
-        end_time = time.time()
-        if rrt_path is not None:
-            rrt_lengths.append(compute_path_length(rrt_path))
-            rrt_times.append(end_time - start_time)
-        
-        # Measure time for RRT*
-        start_time = time.time()
-        rrt_star_path = rrt_star_planning(
-            start=start_coord,
-            goal=end_coord,
-            obstacles=obstacles,
-            min_x=min_x, max_x=max_x,
-            min_y=min_y, max_y=max_y,
-            min_z=min_z, max_z=max_z,
-            expand_dist=0.5,
-            goal_sample_rate=0.01,
-            max_iter=1000,
-            goal_tolerance=1.0,
-            max_radius=2.0
-        )
-        end_time = time.time()
-        if rrt_star_path is not None:
-            rrt_star_lengths.append(compute_path_length(rrt_star_path))
-            rrt_star_times.append(end_time - start_time)
+
+    # Trials run in parallel over all cores with per-trial seeds; every
+    # trial is stored in results/benchmarks/rrt_vs_rrt_star.json.
+    common = dict(
+        start=start_coord,
+        goal=end_coord,
+        obstacles=obstacles,
+        min_x=min_x, max_x=max_x,
+        min_y=min_y, max_y=max_y,
+        min_z=min_z, max_z=max_z,
+        expand_dist=0.5,
+        goal_sample_rate=0.01,
+        max_iter=1000,
+        goal_tolerance=1.0
+    )
+    report = run_benchmark(
+        {'RRT': (rrt_planning, common),
+         'RRT*': (rrt_star_planning, dict(common, max_radius=2.0))},
+        num_trials=num_runs,
+        seed=0,
+        results_file='results/benchmarks/rrt_vs_rrt_star.json'
+    )
+
+    # Path lengths and computation times of the successful runs
+    trials = report['trials']
+    rrt_lengths = [t['length'] for t in trials if t['planner'] == 'RRT' and t['success']]
+    rrt_times = [t['time_ns'] / 1e9 for t in trials if t['planner'] == 'RRT' and t['success']]
+    rrt_star_lengths = [t['length'] for t in trials if t['planner'] == 'RRT*' and t['success']]
+    rrt_star_times = [t['time_ns'] / 1e9 for t in trials if t['planner'] == 'RRT*' and t['success']]
     
     # Compute means
     rrt_mean_length = np.mean(rrt_lengths)
@@ -494,3 +556,5 @@ if __name__ == "__main__":
     # Print average computation times
     print(f"Average computation time for RRT: {rrt_mean_time:.4f} seconds")
     print(f"Average computation time for RRT*: {rrt_star_mean_time:.4f} seconds")
+    print(f"Success rate RRT: {report['summary']['RRT']['success_rate']:.1%}, "
+          f"RRT*: {report['summary']['RRT*']['success_rate']:.1%}")
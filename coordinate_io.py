@@ -0,0 +1,62 @@
+"""Reading and writing of point files: routes and obstacle locations.
+
+One parser for "route.txt", "obsLocationRandom.txt" and their binary
+versions, used by rrt_example_1.py, pid_one_drone.py, droneController.py and
+scenario_farm.py. Points always come back as an (N, 3) float64 array.
+
+Two formats are understood, told apart by the first bytes of the file, not
+by its name:
+
+- binary: a NumPy .npy file holding an (N, 3) float64 array. It is opened
+  with np.load(mmap_mode='r'), so even very large files load without
+  parsing or copying; the pages are read when they are used.
+- text (the original format): one "(x, y, z)" tuple per line, as written by
+  printing a Python tuple. Parsed in one pass over the whole file.
+
+write_points picks the format from the file name: ".npy" is binary,
+anything else text.
+"""
+import numpy as np
+
+_NPY_MAGIC = b"\x93NUMPY"
+
+
+def read_points(path):
+    """(N, 3) float64 array of the points in `path`, in either format."""
+    with open(path, 'rb') as file:
+        binary = file.read(len(_NPY_MAGIC)) == _NPY_MAGIC
+    if binary:
+        points = np.load(path, mmap_mode='r')
+        if points.dtype != np.float64:
+            points = points.astype(np.float64)
+    else:
+        with open(path, 'r') as file:
+            text = file.read()
+        points = np.array(text.translate(_SEPARATORS).split(), dtype=np.float64)
+    return points.reshape(-1, 3)
+
+
+_SEPARATORS = str.maketrans("(),", "   ")
+
+
+def write_points(path, points, decimals=None):
+    """Write `points` to `path`, as .npy if the name ends in ".npy" and as
+    "(x, y, z)" lines otherwise, with `decimals` digits if given."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if str(path).endswith(".npy"):
+        np.save(path, points)
+        return
+    if decimals is None:
+        lines = [f"{tuple(p)}\n" for p in points.tolist()]
+    else:
+        lines = [f"({x:.{decimals}f}, {y:.{decimals}f}, {z:.{decimals}f})\n" for x, y, z in points.tolist()]
+    with open(path, 'w') as file:
+        file.writelines(lines)
+
+
+def points_to_boxes(centers, size=1.0):
+    """Obstacle boxes (x_min, x_max, y_min, y_max, z_min, z_max) of cubes
+    with edge `size` around `centers`, as an (N, 6) array for the planner."""
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    half = size / 2
+    return np.stack([centers - half, centers + half], axis=2).reshape(-1, 6)
@@ -7,36 +7,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 #from gym_pybullet_drones.envs.BaseAviary import BaseAviary
 
-# read coordinates from the route.txt file and return them as a list
-def readGoalCoordinates():
+from coordinate_io import read_points
+from state_channel import StateChannel
 
-	file_name = "route.txt"
-	coordinates = []
-
-	with open(file_name, 'r') as file:
-		for line in file:
-			line = line.strip().strip('()')
-			if line:
-				x, y, z = map(float, line.split(','))
-				coordinates.append((x,y,z))
-	return coordinates
-	
-# write coordinates to goalCoordinates.txt
-def writeCoordinates(coordinates):
-	file_name = "goalCoordinates.txt"
-	with open(file_name, 'w') as file:
-		for coord in coordinates:
-			file.write(f"{coord}\n")
-			
-# Read the coordinates of where the robot currently is from currentCoordinates.txt		
-def readCurrentCoordinates():
-	file_name = "currentCoordinates.txt"
-	
-	with open(file_name, 'r') as file:
-		lines = file.readlines()
-		return [float(line.strip()) for line in lines]
-		
-		
+# read coordinates from the route.txt file (text or binary, see coordinate_io.py)
+# and return them as a list
+def readGoalCoordinates(file_name="route.txt"):
+	return [tuple(coord) for coord in read_points(file_name).tolist()]
 	
 # calculate the distance between 2 points in a 3d space	
 def calculateDistance(gCoord, cCoord):
@@ -51,17 +28,17 @@ def main():
 	goalCoords = readGoalCoordinates() 
 	error = 0.15 # this is the maximum allowable distance between the drone position and the waypoint position
 	
+	# the current position comes from and the target goes to pid_one_drone.py
+	# through shared memory (see state_channel.py)
+	channel = StateChannel()
+	poseSeq = 0
 	
 	# loop trough all the waypoints
 	for gCoord in goalCoords:
-		writeCoordinates(gCoord)
-		cCoord = []
+		channel.write_target(gCoord)
 		
-		# sometimes the coordinates are not read correctly so this ensures that they will be read again until they are read correctly
-		while len(cCoord) < 3:
-			cCoord = readCurrentCoordinates()
-			#print("c = ", cCoord, ",   g = ", gCoord)
-				
+		# wait for the next position update of the simulation
+		poseSeq, cCoord = channel.wait_pose(poseSeq)
 		distance = calculateDistance(gCoord, cCoord)
 		print("c = ", cCoord, ",   g = ", gCoord)
 		print(distance)
@@ -69,16 +46,19 @@ def main():
 		# keep looping until the drone is close enough to the target waypoint.
 		while (distance > error):
 		
-			cCoord = readCurrentCoordinates()
-			while len(cCoord) < 3:
-				cCoord = readCurrentCoordinates()
+			poseSeq, cCoord = channel.wait_pose(poseSeq)
+			
+			# pid_one_drone.py clears the channel when it starts, which also drops
+			# a target written before that, so publish it again when it is gone
+			targetSeq, target = channel.read_target()
+			if target != gCoord:
+				channel.write_target(gCoord)
 			
 			distance = calculateDistance(gCoord, cCoord)
 			print("c = ", cCoord, ",   g = ", gCoord)
 			print(distance)
-#			time.sleep(0.1)
 		
-#		time.sleep(0.1)
+	channel.close()
 		
 		
 		
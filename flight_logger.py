@@ -0,0 +1,119 @@
+"""Streaming flight log with a fixed memory ceiling.
+
+Drop-in for the `log()` calls of gym_pybullet_drones' Logger in
+pid_one_drone.py. The Logger keeps the whole flight in memory (growing its
+arrays every step) and writes it, with one CSV per signal, at the end. This
+logger fills a preallocated chunk of `chunk_size` rows instead; a full chunk
+is handed to a background thread that writes it as one .npz segment
+(columns: drone, timestamp, state, control) while the simulation continues.
+At most `max_pending` chunks wait for the writer; if the disk cannot keep up,
+`log()` waits for it rather than growing, so memory stays bounded at about
+(max_pending + 2) chunks whatever the flight length.
+
+    logger = StreamingLogger(output_folder="results")
+    logger.log(drone=0, timestamp=t, state=obs[0], control=ctrl)
+    ...
+    logger.close()
+    data = load_flight_log(logger.folder)
+"""
+import glob
+import os
+import queue
+import threading
+from datetime import datetime
+
+import numpy as np
+
+
+class StreamingLogger:
+
+    def __init__(self, output_folder="results", chunk_size=4096, max_pending=4):
+        self.folder = os.path.join(output_folder, "save-flight-stream-" + datetime.now().strftime("%m.%d.%Y_%H.%M.%S"))
+        os.makedirs(self.folder, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self._chunk = None
+        self._fill = 0
+        self._segments = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._write_segments, daemon=True)
+        self._writer.start()
+
+    def _new_chunk(self, state_size, control_size):
+        return {'drone': np.empty(self.chunk_size, dtype=np.int32),
+                'timestamp': np.empty(self.chunk_size),
+                'state': np.empty((self.chunk_size, state_size)),
+                'control': np.empty((self.chunk_size, control_size))}
+
+    def log(self, drone, timestamp, state, control=np.zeros(12)):
+        """Same arguments as gym_pybullet_drones' Logger.log; the full state
+        vector is stored."""
+        if self._chunk is None:
+            self._chunk = self._new_chunk(len(state), len(control))
+        chunk = self._chunk
+        k = self._fill
+        chunk['drone'][k] = drone
+        chunk['timestamp'][k] = timestamp
+        chunk['state'][k] = state
+        chunk['control'][k] = control
+        self._fill = k + 1
+        self.rows += 1
+        if self._fill == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if self._error is not None:
+            raise self._error
+        if self._fill:
+            chunk = self._chunk
+            if self._fill < self.chunk_size:
+                chunk = {key: value[:self._fill] for key, value in chunk.items()}
+            # blocks while max_pending chunks are already waiting
+            self._queue.put((self._segments, chunk))
+            self._segments += 1
+            self._chunk = self._new_chunk(chunk['state'].shape[1], chunk['control'].shape[1])
+            self._fill = 0
+
+    def _write_segments(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, chunk = item
+            try:
+                np.savez(os.path.join(self.folder, f"chunk-{index:06d}.npz"), **chunk)
+            except Exception as error:  # reported by the next log() or close()
+                self._error = error
+
+    def close(self):
+        """Write the last partial chunk and wait for the writer to finish."""
+        self._flush()
+        self._queue.put(None)
+        self._writer.join()
+        if self._error is not None:
+            raise self._error
+
+    def to_logger(self, logger_class, logging_freq_hz, num_drones, colab=False):
+        """Replay the written log into a gym_pybullet_drones Logger, for its
+        plot() after a streamed flight. Loads the whole log."""
+        data = load_flight_log(self.folder)
+        duration_sec = int(np.ceil(len(data['timestamp']) / max(num_drones, 1) / logging_freq_hz)) + 1
+        logger = logger_class(logging_freq_hz=logging_freq_hz, num_drones=num_drones,
+                              output_folder=self.folder, duration_sec=duration_sec, colab=colab)
+        for drone, timestamp, state, control in zip(data['drone'], data['timestamp'], data['state'], data['control']):
+            logger.log(drone=int(drone), timestamp=timestamp, state=state, control=control)
+        return logger
+
+
+def load_flight_log(folder, drone=None):
+    """All segments of a streamed log in `folder`, concatenated in order, as
+    a dict of arrays; only the rows of `drone` if given."""
+    segments = [np.load(path) for path in sorted(glob.glob(os.path.join(folder, "chunk-*.npz")))]
+    if not segments:
+        return {}
+    data = {key: np.concatenate([segment[key] for segment in segments]) for key in segments[0].files}
+    if drone is not None:
+        rows = data['drone'] == drone
+        data = {key: value[rows] for key, value in data.items()}
+    return data
@@ -1,20 +1,27 @@
 import random
 
-coordinates = []
+from coordinate_io import write_points
+
+
 
 
 # define the amount of obstacles in the environment
 numOfObstacles = 15
 
-# generate locations for each obstacle
-for _ in range(numOfObstacles):
-    x = random.uniform(0,6)
-    y = random.uniform(0,6)
-    z = random.uniform(2,6)
-    coordinates.append((x, y, z))
-    
-with open("obsLocationRandom.txt", 'w') as file:
-     for coord in coordinates:
-         file.write(f"({coord[0]:.2f}, {coord[1]:.2f}, {coord[2]:.2f})\n")
+# generate locations for each obstacle, `rng` can be a seeded random.Random
+def generateObstacles(numOfObstacles, rng=random):
+    coordinates = []
+    for _ in range(numOfObstacles):
+        x = rng.uniform(0,6)
+        y = rng.uniform(0,6)
+        z = rng.uniform(2,6)
+        coordinates.append((x, y, z))
+    return coordinates
+
+# write the locations of the obstacles to a text file
+def writeObstacles(coordinates, fileName="obsLocationRandom.txt"):
+    write_points(fileName, coordinates, decimals=2)
 
 
+if __name__ == "__main__":
+    writeObstacles(generateObstacles(numOfObstacles))
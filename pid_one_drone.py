@@ -9,6 +9,11 @@ In a terminal, run as:
 
     $ python3 pid_one_drone.py
 
+To fly the route in "route.txt" without droneController.py, headless and as
+fast as the simulation runs, use:
+
+    $ python3 pid_one_drone.py --follow_route True --gui False --plot False
+
 Notes
 -----
 The drones move, at different altitudes, along cicular trajectories 
@@ -32,6 +37,11 @@ from gym_pybullet_drones.control.DSLPIDControl import DSLPIDControl
 from gym_pybullet_drones.utils.Logger import Logger
 from gym_pybullet_drones.utils.utils import sync, str2bool
 
+from coordinate_io import read_points
+from flight_logger import StreamingLogger
+from planner.collision import segment_collides
+from state_channel import StateChannel
+
 DEFAULT_DRONES = DroneModel("cf2x")
 DEFAULT_NUM_DRONES = 1
 DEFAULT_PHYSICS = Physics("pyb")
@@ -45,6 +55,36 @@ DEFAULT_CONTROL_FREQ_HZ = 48
 DEFAULT_DURATION_SEC = 600
 DEFAULT_OUTPUT_FOLDER = 'results'
 DEFAULT_COLAB = False
+DEFAULT_FOLLOW_ROUTE = False
+DEFAULT_ROUTE_FILE = 'route.txt'
+DEFAULT_WAYPOINT_ERROR = 0.15
+DEFAULT_OBSTACLE_FILE = 'obsLocationRandom.txt'
+DEFAULT_STREAM_LOG = False
+MAX_WAYPOINT_MARKERS = 1000 # longer routes only get every n-th waypoint marked
+DRONE_RADIUS = 0.06 # distance from the centre of the drone to its rotor tips
+
+def createBoxes(positions, halfExtent, rgbaColor, collision, client):
+    # create a static cube at every position in one batch: the visual (and
+    # collision) shape is made once and shared, instead of loading and
+    # recolouring "cube.urdf" for every single cube. Returns the body ids.
+    if len(positions) == 0:
+        return []
+    visualShape = p.createVisualShape(p.GEOM_BOX,
+                                      halfExtents=[halfExtent]*3,
+                                      rgbaColor=rgbaColor,
+                                      physicsClientId=client)
+    collisionShape = -1
+    if collision:
+        collisionShape = p.createCollisionShape(p.GEOM_BOX,
+                                                halfExtents=[halfExtent]*3,
+                                                physicsClientId=client)
+    bodies = p.createMultiBody(baseMass=0,
+                               baseCollisionShapeIndex=collisionShape,
+                               baseVisualShapeIndex=visualShape,
+                               batchPositions=np.asarray(positions, dtype=float).tolist(),
+                               useMaximalCoordinates=True,
+                               physicsClientId=client)
+    return list(np.atleast_1d(bodies))
 
 def run(
         drone=DEFAULT_DRONES,
@@ -59,8 +99,21 @@ def run(
         control_freq_hz=DEFAULT_CONTROL_FREQ_HZ,
         duration_sec=DEFAULT_DURATION_SEC,
         output_folder=DEFAULT_OUTPUT_FOLDER,
-        colab=DEFAULT_COLAB
+        colab=DEFAULT_COLAB,
+        follow_route=DEFAULT_FOLLOW_ROUTE,
+        route_file=DEFAULT_ROUTE_FILE,
+        waypoint_error=DEFAULT_WAYPOINT_ERROR,
+        obstacle_file=DEFAULT_OBSTACLE_FILE,
+        stream_log=DEFAULT_STREAM_LOG
         ):
+    # With follow_route the waypoints of route_file are flown in this process
+    # (the job of droneController.py otherwise) and the run ends when the
+    # last one is reached or the drone crashes into an obstacle or the
+    # ground; duration_sec is then only an upper limit.
+    # With stream_log the flight log is written in chunks while flying
+    # (see flight_logger.py) instead of being kept in memory and saved as
+    # CSV files at the end.
+    # Returns a summary of the flight.
     #### Initialize the simulation #############################
     H = .1
     H_STEP = .05
@@ -69,19 +122,29 @@ def run(
     INIT_RPYS = np.array([[0, 0,  0]]) # starting orientation
 	
 
+    #### Open the channel to droneController.py #################
+    # the current position is published and the target waypoint is
+    # received through shared memory (see state_channel.py); the first
+    # target is the starting position. Not needed when following the
+    # route in this process.
+    channel = None
+    if not follow_route:
+        channel = StateChannel()
+        channel.reset()
+        channel.write_target(INIT_XYZS[0])
+
     #### Create trajectory ######################
     # this creates the initial trajectory to the first coordinate,
     # later in the code the coordinates in TARGET_POS are refreshed 
-    # by reading from the txt file 
+    # from the target in the channel
     
     PERIOD = 10
     NUM_WP = control_freq_hz*PERIOD
     TARGET_POS = np.zeros((NUM_WP,3))
     
-    for i in range(NUM_WP):
-    	with open("goalCoordinates.txt", "r") as file:
-    		variables = [float(line.strip()) for line in file]
-    	TARGET_POS[i, :] = variables[0], variables[1], variables[2]
+    TARGET_POS[:, :] = INIT_XYZS[0]
+    if channel is not None:
+        targetSeq, _ = channel.read_target()
     	
     wp_counters = np.array([int((i*NUM_WP/6)%NUM_WP) for i in range(num_drones)])
 
@@ -107,11 +170,14 @@ def run(
     PYB_CLIENT = env.getPyBulletClient()
 
     #### Initialize the logger #################################
-    logger = Logger(logging_freq_hz=control_freq_hz,
-                    num_drones=num_drones,
-                    output_folder=output_folder,
-                    colab=colab
-                    )
+    if stream_log:
+        logger = StreamingLogger(output_folder=output_folder)
+    else:
+        logger = Logger(logging_freq_hz=control_freq_hz,
+                        num_drones=num_drones,
+                        output_folder=output_folder,
+                        colab=colab
+                        )
 
     #### Initialize the controllers ############################
     if drone in [DroneModel.CF2X, DroneModel.CF2P]:
@@ -120,65 +186,75 @@ def run(
 
     #### Load all the obstacles ################################
     
-    # this is a function to load coordinates from text files
-    def parseCoordinates(filePath):
-        coords = []
-        with open(filePath, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line.startswith("(") and line.endswith(")"):
-                    coord = line[1:-1].split(",")
-                    coords.append(tuple(map(float, coord)))
-        return coords
-        
-    # load the locations for the obstalces from txt file
-    coordinatesObstacles = parseCoordinates("obsLocationRandom.txt")
+    # load the locations for the obstalces from the obstacle file
+    # (text or binary, see coordinate_io.py)
+    coordinatesObstacles = read_points(obstacle_file)
     
-    # loop trough the coordinates and load an obtsacle at each point
-    for coord in coordinatesObstacles:
-        x, y, z = coord
-        obstacle = p.loadURDF("cube.urdf",
-                   [x, y, z],
-                   useFixedBase=True,
-                   globalScaling=0.95,
-                   )
-        p.changeVisualShape(obstacle, -1, rgbaColor=[1,0,0,0.3])
-        p.setCollisionFilterGroupMask(obstacle, -1, collisionFilterGroup=1, collisionFilterMask=2)
+    # place a see-through red cube (0.95 wide) at each point, all at once
+    for obstacle in createBoxes(coordinatesObstacles, 0.95/2, [1,0,0,0.3], True, PYB_CLIENT):
+        p.setCollisionFilterGroupMask(obstacle, -1, collisionFilterGroup=1, collisionFilterMask=2, physicsClientId=PYB_CLIENT)
 
 
     #### Load visuals at waypoints #############################
     
     # store all waypoints in a variable
-    coordinatesWaypoints = parseCoordinates("route.txt")
+    coordinatesWaypoints = read_points(route_file)
     
-    #loop trough all the waypoints and place visuals at each point
-    for i, coord in enumerate(coordinatesWaypoints):
-        x, y, z = coord
-        if i == len(coordinatesWaypoints) - 1: # visual for the final waypoint
-            endPoint = p.loadURDF("cube.urdf", [x, y, z], useFixedBase=True, globalScaling=0.1)
-            p.setCollisionFilterGroupMask(endPoint, -1, collisionFilterGroup=0, collisionFilterMask=0)
-            p.changeVisualShape(endPoint, -1, rgbaColor=[0,1,0,0.9])
-        else: # visuals for all other waypoints
-            waypointCube = p.loadURDF("cube.urdf", [x, y, z], useFixedBase=True, globalScaling=0.05)
-            p.setCollisionFilterGroupMask(waypointCube, -1, collisionFilterGroup=0, collisionFilterMask=0)
-            p.changeVisualShape(waypointCube, -1, rgbaColor=[1,1,0,0.5])
-            
+    # the markers are only for looking at, so without the GUI (and without
+    # a video) they are skipped. They have no collision shape.
+    if gui or record_video:
+        # small yellow cubes at the waypoints, for very long routes only
+        # every n-th one, and a green cube at the final waypoint
+        step = max(1, int(np.ceil((len(coordinatesWaypoints) - 1) / MAX_WAYPOINT_MARKERS)))
+        createBoxes(coordinatesWaypoints[:-1:step], 0.05/2, [1,1,0,0.5], False, PYB_CLIENT)
+        createBoxes(coordinatesWaypoints[-1:], 0.1/2, [0,1,0,0.9], False, PYB_CLIENT)
+
 
     print("All obstacles and waypoints are loaded.")
+
+    #### Obstacle boxes for crash detection ####################
+    # the obstacles do not collide with the drone in the simulation, so a
+    # crash is detected by checking the movement of the drone in every step
+    # against the obstacle cubes grown by the size of the drone
+    half = 0.95/2 + DRONE_RADIUS
+    obstacleBoxes = [(x-half, x+half, y-half, y+half, z-half, z+half) for x, y, z in coordinatesObstacles]
+    crashed = False
+
+    #### Start at the first waypoint of the route ##############
+    wpIndex = 0
+    routeDone = False
+    if follow_route:
+        TARGET_POS[:, :] = coordinatesWaypoints[0]
+
     #### Run the simulation ####################################
     action = np.zeros((num_drones,4))
     START = time.time()
+    simTime = 0.0
     for i in range(0, int(duration_sec*env.CTRL_FREQ)):
-        
-        # Here are the coordinates read from the txt file
-        for i in range(NUM_WP):
-    	    with open("goalCoordinates.txt", "r") as file:
-    	        newVariables = [float(line.strip()) for line in file if line.strip()]
-    	    		
-    	    if newVariables:
-    	    	variables = newVariables
-    	    	
-    	    TARGET_POS[i, :] = variables[0], variables[1], variables[2]
+        simTime = i/env.CTRL_FREQ
+
+        if follow_route:
+            if i > 0 and (env.pos[0, 2] < DRONE_RADIUS
+                          or segment_collides(previousPos, env.pos[0], obstacleBoxes)):
+                crashed = True
+                break
+            previousPos = env.pos[0].copy()
+
+            # same rule as droneController.py: move on to the next waypoint
+            # once the drone is within waypoint_error of the current one
+            if np.linalg.norm(env.pos[0] - coordinatesWaypoints[wpIndex]) <= waypoint_error:
+                wpIndex += 1
+                if wpIndex == len(coordinatesWaypoints):
+                    routeDone = True
+                    break
+                TARGET_POS[:, :] = coordinatesWaypoints[wpIndex]
+        else:
+            # TARGET_POS is only rewritten when droneController.py published a
+            # new target, which the sequence number of the target tells
+            seq, newVariables = channel.read_target()
+            if seq != targetSeq:
+                targetSeq = seq
+                TARGET_POS[:, :] = newVariables
 
         #### Make it rain rubber ducks #############################
         # if i/env.SIM_FREQ>5 and i%10==0 and i/env.SIM_FREQ<10: p.loadURDF("duck_vhacd.urdf", [0+random.gauss(0, 0.3),-0.5+random.gauss(0, 0.3),3], p.getQuaternionFromEuler([random.randint(0,360),random.randint(0,360),random.randint(0,360)]), physicsClientId=PYB_CLIENT)
@@ -211,29 +287,47 @@ def run(
         #### Printout ##############################################
         #aap = env.render()
         
-        ## Write info to currentCoordinates.txt ####################
+        ## Publish the current position ###########################
         #print(f"x = {env.pos[0, 0]:.2f}, y = {env.pos[0, 1]:.2f}, z = {env.pos[0, 2]:.2f}")
         
-        with open("currentCoordinates.txt", "w") as file:
-        	file.write(f"{env.pos[0, 0]:.2f}\n")
-        	file.write(f"{env.pos[0, 1]:.2f}\n")
-        	file.write(f"{env.pos[0, 2]:.2f}\n")
+        if channel is not None:
+            channel.write_pose(env.pos[0])
 
         #### Sync the simulation ###################################
         if gui:
             sync(i, START, env.CTRL_TIMESTEP)
 
     #### Close the environment #################################
+    wallTime = time.time() - START
     env.close()
+    if channel is not None:
+        channel.close()
+    if follow_route:
+        if crashed:
+            print(f"Crashed at {env.pos[0]} after {simTime:.1f} s simulated")
+        print(f"Reached {wpIndex} of {len(coordinatesWaypoints)} waypoints in {simTime:.1f} s simulated "
+              f"({wallTime:.1f} s wall clock, {simTime / max(wallTime, 1e-9):.1f}x real time)")
 
     #### Save the simulation results ###########################
-    logger.save()
-    logger.save_as_csv("pid") # Optional CSV save
+    if stream_log:
+        logger.close() # only the last chunk is still to be written
+    else:
+        logger.save()
+        logger.save_as_csv("pid") # Optional CSV save
 
     #### Plot the simulation results ###########################
     if plot:
+        if stream_log:
+            logger = logger.to_logger(Logger, control_freq_hz, num_drones, colab)
         logger.plot()
 
+    return {'route_done': routeDone,
+            'crashed': crashed,
+            'waypoints_reached': wpIndex,
+            'waypoints': len(coordinatesWaypoints),
+            'sim_time_sec': simTime,
+            'wall_time_sec': wallTime}
+
 if __name__ == "__main__":
     #### Define and parse (optional) arguments for the script ##
     parser = argparse.ArgumentParser(description='Helix flight script using CtrlAviary and DSLPIDControl')
@@ -250,6 +344,11 @@ if __name__ == "__main__":
     parser.add_argument('--duration_sec',       default=DEFAULT_DURATION_SEC,         type=int,           help='Duration of the simulation in seconds (default: 5)', metavar='')
     parser.add_argument('--output_folder',     default=DEFAULT_OUTPUT_FOLDER, type=str,           help='Folder where to save logs (default: "results")', metavar='')
     parser.add_argument('--colab',              default=DEFAULT_COLAB, type=bool,           help='Whether example is being run by a notebook (default: "False")', metavar='')
+    parser.add_argument('--follow_route',       default=DEFAULT_FOLLOW_ROUTE, type=str2bool,   help='Whether to fly the route in this process instead of through droneController.py (default: False)', metavar='')
+    parser.add_argument('--route_file',         default=DEFAULT_ROUTE_FILE, type=str,          help='Route to load and, with --follow_route, to fly (default: "route.txt")', metavar='')
+    parser.add_argument('--obstacle_file',      default=DEFAULT_OBSTACLE_FILE, type=str,       help='Obstacle locations to load (default: "obsLocationRandom.txt")', metavar='')
+    parser.add_argument('--stream_log',         default=DEFAULT_STREAM_LOG, type=str2bool,     help='Whether to write the log in chunks while flying instead of at the end (default: False)', metavar='')
+    parser.add_argument('--waypoint_error',     default=DEFAULT_WAYPOINT_ERROR, type=float,    help='Distance at which a waypoint counts as reached (default: 0.15)', metavar='')
     ARGS = parser.parse_args()
 
     run(**vars(ARGS))
@@ -0,0 +1,140 @@
+import time
+
+import numpy as np
+
+from planner.benchmark import path_length
+from planner.collision import as_obstacle_array, segment_pairs_hit_boxes
+from planner.sampling import make_rng, spawn_seeds
+
+# ----------------------------------------------
+#  Lockstep batch RRT: many instances per array op
+# ----------------------------------------------
+# rrt_planning spends most of a small run in per-iteration Python overhead.
+# batch_rrt_planning runs K independent instances of the same algorithm
+# together: every iteration samples, finds the nearest node, steers and
+# collision-checks for all still-running instances with one array operation
+# each, along the batch dimension. Instances stop on their own as soon as
+# they reach the goal and then cost nothing. Trees are stored as (K, n)
+# coordinate planes padded with inf, so the nearest-node search is a single
+# masked-free distance pass over the batch. Collision checks use the exact
+# box test on all boxes, since one broad-phase lookup per instance would
+# bring the per-instance loop back.
+#
+# This complements the process pool in planner/benchmark.py: batch_trials
+# gives the same per-trial rows as run_trial, for many trials on one core.
+
+
+def batch_rrt_planning(start, goal, obstacles,
+                       min_x, max_x, min_y, max_y, min_z, max_z,
+                       expand_dist=1.0, goal_sample_rate=0.05,
+                       max_iter=1000, goal_tolerance=1.0, batch_size=100, seed=None):
+    """
+    Run `batch_size` independent RRT instances of one problem in lockstep.
+    `start` and `goal` are single points or (batch_size, 3) arrays with one
+    per instance. Returns (paths, iterations): for every instance its path
+    as in rrt_planning (or None) and the number of samples it drew.
+    """
+    k = batch_size
+    rng = make_rng(seed)
+    boxes = as_obstacle_array(getattr(obstacles, 'boxes', obstacles))
+    lo = np.array([min_x, min_y, min_z], dtype=float)
+    hi = np.array([max_x, max_y, max_z], dtype=float)
+    starts = np.broadcast_to(np.asarray(start, dtype=float), (k, 3))
+    goals = np.broadcast_to(np.asarray(goal, dtype=float), (k, 3))
+
+    capacity = min(max_iter + 1, 256)
+    xyz = np.full((3, k, capacity), np.inf)
+    xyz[:, :, 0] = starts.T
+    parent = np.full((k, capacity), -1, dtype=np.intp)
+    size = np.ones(k, dtype=np.intp)
+    goal_node = np.full(k, -1, dtype=np.intp)
+    iterations = np.full(k, max_iter, dtype=np.intp)
+    active = np.arange(k)
+
+    for it in range(max_iter):
+        if len(active) == 0:
+            break
+        if size.max() == capacity:
+            grown = min(2 * capacity, max_iter + 1)
+            xyz = np.concatenate([xyz, np.full((3, k, grown - capacity), np.inf)], axis=2)
+            parent = np.concatenate([parent, np.full((k, grown - capacity), -1, dtype=np.intp)], axis=1)
+            capacity = grown
+        n = int(size[active].max())
+        a = len(active)
+
+        # sample, with goal biasing per instance
+        samples = rng.uniform(lo, hi, size=(a, 3))
+        biased = rng.random(a) < goal_sample_rate
+        samples[biased] = goals[active[biased]]
+
+        # nearest node: unused slots are inf, so no mask is needed
+        x, y, z = xyz[:, active, :n]
+        d2 = (x - samples[:, 0:1])**2 + (y - samples[:, 1:2])**2 + (z - samples[:, 2:3])**2
+        nearest = d2.argmin(axis=1)
+        near = np.stack([x[np.arange(a), nearest], y[np.arange(a), nearest], z[np.arange(a), nearest]], axis=1)
+
+        # steer expand_dist towards the sample
+        direction = samples - near
+        dist = np.sqrt((direction**2).sum(axis=1))
+        far = dist >= 1e-9
+        new = samples.copy()
+        new[far] = near[far] + expand_dist * direction[far] / dist[far, None]
+
+        free = ~segment_pairs_hit_boxes(near, new, boxes)
+        grow = active[free]
+        slot = size[grow]
+        xyz[:, grow, slot] = new[free].T
+        parent[grow, slot] = nearest[free]
+        size[grow] += 1
+
+        reached = np.sqrt(((new[free] - goals[grow])**2).sum(axis=1)) < goal_tolerance
+        done = grow[reached]
+        goal_node[done] = slot[reached]
+        iterations[done] = it + 1
+        if len(done):
+            active = active[~np.isin(active, done)]
+
+    paths = []
+    for i in range(k):
+        if goal_node[i] < 0:
+            paths.append(None)
+            continue
+        nodes = []
+        j = goal_node[i]
+        while j >= 0:
+            nodes.append(j)
+            j = parent[i, j]
+        nodes.reverse()
+        path = [tuple(p) for p in xyz[:, i, nodes].T.tolist()]
+        path.append((goals[i][0], goals[i][1], goals[i][2]))
+        paths.append(path)
+    return paths, iterations
+
+
+def batch_trials(num_trials, batch_size=100, seed=0, name='RRT (batch)', **problem):
+    """
+    `num_trials` trials of batch_rrt_planning on `problem` (its keyword
+    arguments without seed and batch_size), as rows shaped like those of
+    planner.benchmark.run_trial, so planner.benchmark.summarize applies.
+    Every batch gets its own seed; time_ns is the batch time split evenly
+    over its trials.
+    """
+    trials = []
+    batches = -(-num_trials // batch_size)
+    for b, batch_seed in enumerate(spawn_seeds(seed, batches)):
+        count = min(batch_size, num_trials - b * batch_size)
+        t0 = time.perf_counter_ns()
+        paths, iterations = batch_rrt_planning(batch_size=count, seed=batch_seed, **problem)
+        elapsed = (time.perf_counter_ns() - t0) // count
+        for i, (path, its) in enumerate(zip(paths, iterations.tolist())):
+            trials.append({
+                'planner': name,
+                'trial': b * batch_size + i,
+                'success': path is not None,
+                'length': path_length(path) if path is not None else None,
+                'waypoints': len(path) if path is not None else 0,
+                'iterations': its,
+                'tree_size': None,
+                'time_ns': elapsed,
+            })
+    return trials
@@ -0,0 +1,149 @@
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from planner.sampling import spawn_seeds
+from planner.stats import PlanStats
+
+# ----------------------------------------
+#  Process-parallel Monte Carlo benchmarks
+# ----------------------------------------
+# Every trial is one planner call with its own seed. Trial i of every
+# planner gets the same seed (SeedSequence(seed).spawn(n)[i]), so the
+# planners are compared on the same sample streams and any single trial can
+# be rerun on its own. Trials are spread over a process pool; the planners
+# and their arguments are sent to each worker once, a task only carries the
+# planner name, the trial number and the seed. Times are taken with
+# perf_counter_ns inside the worker around the planner call alone.
+
+_planners = None
+
+
+def _init_worker(planners):
+    global _planners
+    _planners = planners
+
+
+def path_length(path):
+    if not path or len(path) < 2:
+        return 0.0
+    xyz = np.asarray(path, dtype=float)
+    return float(np.sqrt(((xyz[1:] - xyz[:-1])**2).sum(axis=1)).sum())
+
+
+def run_trial(task):
+    """
+    Run one trial in the worker; `task` is (planner name, trial, seed).
+    """
+    name, trial, seed = task
+    planner, kwargs = _planners[name]
+    stats = PlanStats()
+    t0 = time.perf_counter_ns()
+    path = planner(seed=seed, stats=stats, **kwargs)
+    elapsed = time.perf_counter_ns() - t0
+    return {
+        'planner': name,
+        'trial': trial,
+        'success': path is not None,
+        'length': path_length(path) if path is not None else None,
+        'waypoints': len(path) if path is not None else 0,
+        'iterations': stats.iterations,
+        'tree_size': stats.tree_size,
+        'time_ns': elapsed,
+    }
+
+
+def summarize(trials):
+    """
+    Per-planner success rate and mean/median/p95 of length, time and
+    iterations. Lengths only count successful trials.
+    """
+    summary = {}
+    for name in dict.fromkeys(t['planner'] for t in trials):
+        rows = [t for t in trials if t['planner'] == name]
+        solved = [t for t in rows if t['success']]
+        entry = {
+            'trials': len(rows),
+            'successes': len(solved),
+            'success_rate': len(solved) / len(rows),
+        }
+        for key, values in (('length', [t['length'] for t in solved]),
+                            ('time_ms', [t['time_ns'] / 1e6 for t in rows]),
+                            ('iterations', [t['iterations'] for t in rows])):
+            if values:
+                entry[key] = {
+                    'mean': float(np.mean(values)),
+                    'median': float(np.median(values)),
+                    'p95': float(np.percentile(values, 95)),
+                }
+        summary[name] = entry
+    return summary
+
+
+def run_benchmark(planners, num_trials, seed=0, processes=None, chunksize=None,
+                  results_file=None, progress=True):
+    """
+    Run `num_trials` trials of every planner in `planners`, a dict mapping a
+    name to (planner function, keyword arguments without seed). Planner
+    functions must be importable module-level functions.
+
+    Returns {'config', 'summary', 'trials'}; the same structure is written as
+    JSON to `results_file` if given. Trials are sorted by planner and trial.
+    """
+    processes = processes or os.cpu_count() or 1
+    seeds = spawn_seeds(seed, num_trials)
+    tasks = [(name, trial, seeds[trial]) for trial in range(num_trials) for name in planners]
+    if chunksize is None:
+        # A few chunks per worker keeps the pool busy without per-task overhead.
+        chunksize = max(1, math.ceil(len(tasks) / (processes * 8)))
+
+    t0 = time.perf_counter_ns()
+    with Pool(processes, initializer=_init_worker, initargs=(planners,)) as pool:
+        results = pool.imap_unordered(run_trial, tasks, chunksize=chunksize)
+        if progress:
+            from tqdm import tqdm
+            results = tqdm(results, total=len(tasks), desc="Running benchmark trials")
+        trials = list(results)
+    wall_ns = time.perf_counter_ns() - t0
+
+    order = {name: k for k, name in enumerate(planners)}
+    trials.sort(key=lambda t: (order[t['planner']], t['trial']))
+    report = {
+        'config': {
+            'seed': seed,
+            'num_trials': num_trials,
+            'processes': processes,
+            'wall_time_s': wall_ns / 1e9,
+            'planners': {name: {'function': f'{planner.__module__}.{planner.__name__}',
+                                'kwargs': _jsonable(kwargs)}
+                         for name, (planner, kwargs) in planners.items()},
+        },
+        'summary': summarize(trials),
+        'trials': trials,
+    }
+    if results_file is not None:
+        directory = os.path.dirname(results_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(results_file, 'w') as file:
+            json.dump(report, file, indent=1)
+    return report
+
+
+def _jsonable(kwargs):
+    # Obstacle lists and arrays become nested lists; anything else that JSON
+    # cannot hold (classes, prebuilt grids) is recorded by name.
+    out = {}
+    for key, value in kwargs.items():
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        try:
+            json.dumps(value)
+        except TypeError:
+            value = getattr(value, '__name__', type(value).__name__)
+        out[key] = value
+    return out
@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+import zlib
+
+import numpy as np
+
+from planner.benchmark import run_benchmark
+from planner.sampling import make_rng, spawn_seeds
+
+# ------------------------------------------------
+#  Scenario-matrix benchmark suite with baselines
+# ------------------------------------------------
+# Sweeps the planners over obstacle count, expand_dist, goal_tolerance and
+# workspace size. Every axis is varied on its own around a base scenario
+# (a full product would be hours of runtime for little extra information).
+# Obstacles and trial seeds are fixed, so two runs of the suite only differ
+# by the code under test and the machine.
+#
+#   python -m planner.benchmark_suite --update-baseline   # record a baseline
+#   python -m planner.benchmark_suite                     # compare against it
+#
+# The comparison exits with status 1 if any scenario regressed in median or
+# p95 time to solution, peak memory or success rate. Baselines hold absolute
+# times, so only compare runs made on the same machine.
+
+BASE = dict(obstacles=200, expand_dist=0.5, goal_tolerance=1.0, workspace=20.0)
+SWEEP = dict(
+    obstacles=[15, 50, 200, 500, 1000, 2000],
+    expand_dist=[0.25, 0.5, 1.0],
+    goal_tolerance=[0.5, 1.0, 2.0],
+    workspace=[10.0, 20.0, 40.0],
+)
+DEFAULT_BASELINE = 'results/benchmarks/baseline.json'
+DEFAULT_OUTPUT = 'results/benchmarks/latest.json'
+
+
+def scenarios():
+    """
+    The scenario matrix: BASE plus every single-axis variation of it, as
+    (name, parameters) pairs without duplicates.
+    """
+    seen = {}
+    for axis, values in SWEEP.items():
+        for value in values:
+            params = dict(BASE, **{axis: value})
+            name = 'obs{obstacles}_ed{expand_dist}_tol{goal_tolerance}_ws{workspace:g}'.format(**params)
+            seen.setdefault(name, params)
+    return list(seen.items())
+
+
+def random_boxes(count, workspace, start, goal, seed):
+    """
+    `count` axis-aligned boxes with edges of 1-5% of the workspace, none of
+    them touching the start or goal. Same seed, same boxes.
+    """
+    rng = make_rng(seed)
+    keep_clear = np.array([start, goal])
+    margin = 0.05 * workspace
+    boxes = []
+    while len(boxes) < count:
+        n = count - len(boxes)
+        size = rng.uniform(0.01, 0.05, size=(n, 3)) * workspace
+        lo = rng.uniform(0.0, workspace, size=(n, 3)) - size / 2
+        hi = lo + size
+        clear = ~((keep_clear[:, None, :] >= lo - margin) & (keep_clear[:, None, :] <= hi + margin)).all(axis=2).any(axis=0)
+        boxes.extend(np.stack([lo, hi], axis=2).reshape(-1, 6)[clear].tolist())
+    return [tuple(b) for b in boxes[:count]]
+
+
+def problem(params, seed, max_iter):
+    workspace = params['workspace']
+    start = (0.05 * workspace,) * 3
+    goal = (0.95 * workspace,) * 3
+    return dict(
+        start=start,
+        goal=goal,
+        obstacles=random_boxes(params['obstacles'], workspace, start, goal, seed),
+        min_x=0.0, max_x=workspace,
+        min_y=0.0, max_y=workspace,
+        min_z=0.0, max_z=workspace,
+        expand_dist=params['expand_dist'],
+        goal_sample_rate=0.05,
+        max_iter=max_iter,
+        goal_tolerance=params['goal_tolerance'],
+    )
+
+
+def default_planners():
+    from planner.rrt_3d_planner import rrt_planning
+    from RRT_and_RRTStar import rrt_star_planning
+    return {'rrt': (rrt_planning, {}), 'rrt_star': (rrt_star_planning, {'max_radius': 2.0})}
+
+
+def peak_memory(planner, kwargs, seeds):
+    """
+    Median peak of Python heap allocations (tracemalloc) over one planner
+    call per seed. Measured in this process, separate from the timed runs.
+    """
+    peaks = []
+    for seed in seeds:
+        tracemalloc.start()
+        try:
+            planner(seed=seed, **kwargs)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return int(np.median(peaks))
+
+
+def run_suite(planners=None, trials=20, memory_trials=3, seed=0, max_iter=5000,
+              processes=None, only=None, progress=True):
+    """
+    Run every scenario (or those whose name contains `only`) and return
+    {'commit', 'scenarios': {name: {'params', planner: metrics}}}.
+    """
+    planners = planners if planners is not None else default_planners()
+    report = {'commit': _git_commit(), 'seed': seed, 'trials': trials, 'scenarios': {}}
+    for name, params in scenarios():
+        if only and only not in name:
+            continue
+        # Obstacles depend on the scenario name, not its place in the matrix.
+        base = problem(params, [seed, zlib.crc32(name.encode())], max_iter)
+        if progress:
+            print(f"[{name}]", file=sys.stderr)
+        bench = run_benchmark({label: (planner, dict(base, **extra)) for label, (planner, extra) in planners.items()},
+                              num_trials=trials, seed=seed, processes=processes, progress=progress)
+        entry = {'params': params}
+        memory_seeds = spawn_seeds(seed, memory_trials)
+        for label, (planner, extra) in planners.items():
+            rows = [t for t in bench['trials'] if t['planner'] == label]
+            solved = [t['time_ns'] / 1e6 for t in rows if t['success']]
+            entry[label] = {
+                'success_rate': bench['summary'][label]['success_rate'],
+                'time_ms_median': float(np.median(solved)) if solved else None,
+                'time_ms_p95': float(np.percentile(solved, 95)) if solved else None,
+                'length_median': bench['summary'][label].get('length', {}).get('median'),
+                'peak_kib': peak_memory(planner, dict(base, **extra), memory_seeds) / 1024,
+            }
+        report['scenarios'][name] = entry
+    return report
+
+
+def compare(current, baseline, time_tolerance=0.25, memory_tolerance=0.10,
+            success_tolerance=0.05, min_time_ms=1.0):
+    """
+    Regressions of `current` against `baseline` as a list of messages.
+    A time or memory metric regresses when it grows by more than its
+    relative tolerance (and, for times, by at least `min_time_ms`); the
+    success rate when it drops by more than `success_tolerance`.
+    Scenarios missing from either side are skipped.
+    """
+    problems = []
+    for name, entry in current['scenarios'].items():
+        old_entry = baseline['scenarios'].get(name)
+        if old_entry is None:
+            continue
+        for label, new in entry.items():
+            old = old_entry.get(label)
+            if label == 'params' or old is None:
+                continue
+            for key in ('time_ms_median', 'time_ms_p95'):
+                if new[key] is not None and old[key] is not None \
+                        and new[key] > old[key] * (1 + time_tolerance) and new[key] - old[key] >= min_time_ms:
+                    problems.append(f"{name} {label}: {key} {old[key]:.2f} -> {new[key]:.2f}")
+            if new['peak_kib'] > old['peak_kib'] * (1 + memory_tolerance):
+                problems.append(f"{name} {label}: peak_kib {old['peak_kib']:.0f} -> {new['peak_kib']:.0f}")
+            if new['success_rate'] < old['success_rate'] - success_tolerance:
+                problems.append(f"{name} {label}: success_rate {old['success_rate']:.2f} -> {new['success_rate']:.2f}")
+    return problems
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _write(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scenario-matrix benchmark of rrt_planning and rrt_star_planning')
+    parser.add_argument('--trials',          default=20,               type=int,   help='Timed trials per scenario and planner (default: 20)', metavar='')
+    parser.add_argument('--memory_trials',   default=3,                type=int,   help='Trials for the peak memory measurement (default: 3)', metavar='')
+    parser.add_argument('--seed',            default=0,                type=int,   help='Root seed of obstacles and trials (default: 0)', metavar='')
+    parser.add_argument('--max_iter',        default=5000,             type=int,   help='Planner iteration limit (default: 5000)', metavar='')
+    parser.add_argument('--processes',       default=None,             type=int,   help='Worker processes (default: all cores)', metavar='')
+    parser.add_argument('--only',            default=None,             type=str,   help='Only run scenarios whose name contains this', metavar='')
+    parser.add_argument('--baseline',        default=DEFAULT_BASELINE, type=str,   help=f'Baseline file (default: {DEFAULT_BASELINE})', metavar='')
+    parser.add_argument('--output',          default=DEFAULT_OUTPUT,   type=str,   help=f'Results file (default: {DEFAULT_OUTPUT})', metavar='')
+    parser.add_argument('--time_tolerance',  default=0.25,             type=float, help='Allowed relative time increase (default: 0.25)', metavar='')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    ARGS = parser.parse_args()
+
+    report = run_suite(trials=ARGS.trials, memory_trials=ARGS.memory_trials, seed=ARGS.seed,
+                       max_iter=ARGS.max_iter, processes=ARGS.processes, only=ARGS.only)
+    _write(report, ARGS.output)
+    for name, entry in report['scenarios'].items():
+        for label, m in entry.items():
+            if label != 'params':
+                time_ms = 'n/a' if m['time_ms_median'] is None else f"{m['time_ms_median']:.1f}"
+                print(f"{name:36s} {label:9s} success {m['success_rate']:6.1%}  median {time_ms:>8s} ms  peak {m['peak_kib']:8.0f} KiB")
+
+    if ARGS.update_baseline:
+        _write(report, ARGS.baseline)
+        print(f"Baseline written to {ARGS.baseline}")
+    elif os.path.exists(ARGS.baseline):
+        with open(ARGS.baseline) as file:
+            regressions = compare(report, json.load(file), time_tolerance=ARGS.time_tolerance)
+        for message in regressions:
+            print("REGRESSION", message)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against", ARGS.baseline)
+    else:
+        print(f"No baseline at {ARGS.baseline}; run with --update-baseline to create one")
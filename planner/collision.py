@@ -0,0 +1,327 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+# ----------------------------------------
+#  Exact segment vs. axis-aligned box tests
+# ----------------------------------------
+# Obstacles are kept as one (N, 6) float array with the same column order as
+# the obstacle tuples: (x_min, x_max, y_min, y_max, z_min, z_max).
+
+
+def as_obstacle_array(obstacles):
+    """
+    Convert a sequence of obstacle tuples to an (N, 6) float array.
+    Arrays that already have that layout are returned unchanged.
+    """
+    boxes = np.asarray(obstacles, dtype=float)
+    return boxes.reshape(-1, 6)
+
+
+def segment_hits_boxes(p_from, p_to, boxes):
+    """
+    Exact slab test of the segment p_from -> p_to against all `boxes`.
+    Boxes are closed, so touching a face counts as a hit.
+    """
+    if len(boxes) == 0:
+        return False
+    return _slab_test(p_from, p_to, boxes[:, 0::2], boxes[:, 1::2])
+
+
+def _slab_test(p_from, p_to, lo, hi):
+    # lo/hi are the (N, 3) min and max corners of the boxes.
+    p0 = np.array(p_from, dtype=float)
+    d = np.array(p_to, dtype=float) - p0
+
+    # The segment's bounding box must overlap the box. For axes the segment
+    # does not move along this is already the complete slab condition.
+    seg_lo = np.minimum(p0, p0 + d)
+    seg_hi = np.maximum(p0, p0 + d)
+    overlap = ((lo <= seg_hi) & (hi >= seg_lo)).all(axis=1)
+    if not overlap.any():
+        return False
+
+    moving = d != 0.0
+    if not moving.any():
+        return True
+    inv = 1.0 / d[moving]
+    t1 = (lo[overlap][:, moving] - p0[moving]) * inv
+    t2 = (hi[overlap][:, moving] - p0[moving]) * inv
+    t_enter = np.minimum(t1, t2).max(axis=1)
+    t_exit = np.maximum(t1, t2).min(axis=1)
+    return bool((np.maximum(t_enter, 0.0) <= np.minimum(t_exit, 1.0)).any())
+
+
+def segments_hit_boxes(p_from, p_tos, boxes):
+    """
+    Batched version of segment_hits_boxes for the M segments p_from -> p_tos[i].
+    Returns a boolean array of length M.
+    """
+    p_tos = np.asarray(p_tos, dtype=float).reshape(-1, 3)
+    if len(boxes) == 0:
+        return np.zeros(len(p_tos), dtype=bool)
+    return _slab_test_many(p_from, p_tos, boxes[:, 0::2], boxes[:, 1::2])
+
+
+def _slab_test_many(p_from, p_tos, lo, hi):
+    # Same test as _slab_test, broadcast to (segments, boxes, axes).
+    p0 = np.array(p_from, dtype=float)
+    d = p_tos - p0
+    seg_lo = np.minimum(p0, p_tos)[:, None, :]
+    seg_hi = np.maximum(p0, p_tos)[:, None, :]
+    overlap = ((lo <= seg_hi) & (hi >= seg_lo)).all(axis=2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = (1.0 / d)[:, None, :]
+        t1 = (lo - p0) * inv
+        t2 = (hi - p0) * inv
+    still = (d == 0.0)[:, None, :]
+    t_enter = np.where(still, -np.inf, np.minimum(t1, t2)).max(axis=2)
+    t_exit = np.where(still, np.inf, np.maximum(t1, t2)).min(axis=2)
+    hit = overlap & (np.maximum(t_enter, 0.0) <= np.minimum(t_exit, 1.0))
+    return hit.any(axis=1)
+
+
+def segment_pairs_hit_boxes(p_froms, p_tos, boxes):
+    """
+    Exact slab test of the M segments p_froms[i] -> p_tos[i], each with its
+    own start, against all `boxes`. Returns a boolean array of length M.
+    """
+    p_froms = np.asarray(p_froms, dtype=float).reshape(-1, 3)
+    p_tos = np.asarray(p_tos, dtype=float).reshape(-1, 3)
+    if len(boxes) == 0:
+        return np.zeros(len(p_tos), dtype=bool)
+    lo = boxes[:, 0::2]
+    hi = boxes[:, 1::2]
+    overlap = ((lo <= np.maximum(p_froms, p_tos)[:, None, :])
+               & (hi >= np.minimum(p_froms, p_tos)[:, None, :])).all(axis=2)
+    # short segments overlap few boxes: run the slab test on those pairs only
+    seg, box = np.nonzero(overlap)
+    hit = np.zeros(len(p_tos), dtype=bool)
+    if len(seg) == 0:
+        return hit
+    p0 = p_froms[seg]
+    d = p_tos[seg] - p0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / d
+        t1 = (lo[box] - p0) * inv
+        t2 = (hi[box] - p0) * inv
+    still = d == 0.0
+    t_enter = np.where(still, -np.inf, np.minimum(t1, t2)).max(axis=1)
+    t_exit = np.where(still, np.inf, np.maximum(t1, t2)).min(axis=1)
+    hit[seg[np.maximum(t_enter, 0.0) <= np.minimum(t_exit, 1.0)]] = True
+    return hit
+
+
+# ---------------------------------
+#  Broad phase: uniform voxel grid
+# ---------------------------------
+class ObstacleGrid:
+    """
+    Uniform voxel grid over the planner bounds, mapping each cell to the
+    boxes that overlap it. Built once per obstacle set; a segment query only
+    runs the slab test on the boxes registered in the cells its bounding box
+    touches. Boxes and segments outside the bounds are clamped onto the
+    border cells, which keeps the candidate set a superset of the real hits.
+    """
+
+    def __init__(self, obstacles, min_x, max_x, min_y, max_y, min_z, max_z, cell_size=None):
+        self.boxes = as_obstacle_array(obstacles)
+        self._lo = np.array([min_x, min_y, min_z], dtype=float)
+        extent = np.array([max_x - min_x, max_y - min_y, max_z - min_z], dtype=float)
+        if cell_size is None:
+            # Cells about the size of a typical box keep each box in a handful
+            # of cells; never go below 1/64 of the workspace.
+            sizes = self.boxes[:, 1::2] - self.boxes[:, 0::2]
+            typical = float(np.median(sizes)) if len(sizes) else 0.0
+            cell_size = max(typical, float(extent.max()) / 64, 1e-9)
+        self.cell_size = cell_size
+        self._shape = np.maximum(np.ceil(extent / cell_size), 1).astype(int)
+        self._origin = self._lo.tolist()
+        self._dims = self._shape.tolist()
+        self._all = np.arange(len(self.boxes))
+
+        first = self._cells(self.boxes[:, 0::2])
+        last = self._cells(self.boxes[:, 1::2])
+        cells = {}
+        for i, (a, b) in enumerate(zip(first.tolist(), last.tolist())):
+            for ix in range(a[0], b[0] + 1):
+                for iy in range(a[1], b[1] + 1):
+                    for iz in range(a[2], b[2] + 1):
+                        cells.setdefault(self._key(ix, iy, iz), []).append(i)
+        # Each cell keeps contiguous copies of its boxes' corners so a query
+        # in a single cell needs no gather.
+        self._box_lo = np.ascontiguousarray(self.boxes[:, 0::2])
+        self._box_hi = np.ascontiguousarray(self.boxes[:, 1::2])
+        self._cells_to_boxes = {}
+        for k, v in cells.items():
+            ids = np.array(v, dtype=np.intp)
+            self._cells_to_boxes[k] = (ids, self._box_lo[ids], self._box_hi[ids])
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _cells(self, points):
+        c = np.floor((points - self._lo) / self.cell_size).astype(int)
+        return np.clip(c, 0, self._shape - 1)
+
+    def _cell_of(self, point):
+        # Scalar version of _cells for the per-edge queries.
+        cell = []
+        for c, l, n in zip(point, self._origin, self._dims):
+            i = math.floor((c - l) / self.cell_size)
+            cell.append(0 if i < 0 else (n - 1 if i >= n else i))
+        return cell
+
+    def _key(self, ix, iy, iz):
+        return ix + self._dims[0] * (iy + self._dims[1] * iz)
+
+    def candidates(self, p_from, p_to):
+        """
+        Indices of the boxes registered in the cells touched by the
+        bounding box of the segment p_from -> p_to.
+        """
+        return self._candidates_in(map(min, p_from, p_to), map(max, p_from, p_to))
+
+    def _candidates_in(self, lo, hi):
+        ax, ay, az = self._cell_of(lo)
+        bx, by, bz = self._cell_of(hi)
+        count = (bx - ax + 1) * (by - ay + 1) * (bz - az + 1)
+        if count == 1:
+            entry = self._cells_to_boxes.get(self._key(ax, ay, az))
+            return self._all[:0] if entry is None else entry[0]
+        if count > len(self.boxes):
+            return self._all
+        found = [self._cells_to_boxes[k][0]
+                 for k in (self._key(ix, iy, iz)
+                           for ix in range(ax, bx + 1)
+                           for iy in range(ay, by + 1)
+                           for iz in range(az, bz + 1))
+                 if k in self._cells_to_boxes]
+        if not found:
+            return self._all[:0]
+        return np.unique(np.concatenate(found))
+
+    def segment_hits(self, p_from, p_to):
+        ax, ay, az = self._cell_of(map(min, p_from, p_to))
+        bx, by, bz = self._cell_of(map(max, p_from, p_to))
+        if ax == bx and ay == by and az == bz:
+            # Short edges stay inside one cell: use its prepared blocks.
+            entry = self._cells_to_boxes.get(self._key(ax, ay, az))
+            if entry is None:
+                return False
+            return _slab_test(p_from, p_to, entry[1], entry[2])
+        ids = self.candidates(p_from, p_to)
+        if len(ids) == 0:
+            return False
+        return _slab_test(p_from, p_to, self._box_lo[ids], self._box_hi[ids])
+
+    def segments_hit(self, p_from, p_tos):
+        """
+        Batched segment_hits for the segments p_from -> p_tos[i], all tested
+        against the boxes around their common bounding box in one pass.
+        """
+        p_tos = np.asarray(p_tos, dtype=float).reshape(-1, 3)
+        if len(p_tos) == 0:
+            return np.zeros(0, dtype=bool)
+        lo = np.minimum(p_tos.min(axis=0), p_from).tolist()
+        hi = np.maximum(p_tos.max(axis=0), p_from).tolist()
+        ids = self._candidates_in(lo, hi)
+        if len(ids) == 0:
+            return np.zeros(len(p_tos), dtype=bool)
+        return _slab_test_many(p_from, p_tos, self._box_lo[ids], self._box_hi[ids])
+
+
+def _prepared(obstacles):
+    # ObstacleGrid, or anything else answering the same segment queries
+    # (planner.occupancy.OccupancyGrid)
+    return hasattr(obstacles, 'segment_hits') and hasattr(obstacles, 'segments_hit')
+
+
+def segment_collides(p_from, p_to, obstacles):
+    """
+    True if the segment hits any obstacle. `obstacles` is an ObstacleGrid,
+    an OccupancyGrid, an (N, 6) array or a list of obstacle tuples.
+    """
+    if _prepared(obstacles):
+        return obstacles.segment_hits(p_from, p_to)
+    return segment_hits_boxes(p_from, p_to, as_obstacle_array(obstacles))
+
+
+def segments_collide(p_from, p_tos, obstacles):
+    """
+    Batched segment_collides for the segments p_from -> p_tos[i].
+    """
+    if _prepared(obstacles):
+        return obstacles.segments_hit(p_from, p_tos)
+    return segments_hit_boxes(p_from, p_tos, as_obstacle_array(obstacles))
+
+
+def obstacle_grid(obstacles, min_x, max_x, min_y, max_y, min_z, max_z):
+    """
+    Return `obstacles` as an ObstacleGrid over the given bounds, reusing it
+    (or an OccupancyGrid) if the caller already built one.
+    """
+    if _prepared(obstacles):
+        return obstacles
+    return ObstacleGrid(obstacles, min_x, max_x, min_y, max_y, min_z, max_z)
+
+
+# -------------------------------
+#  Per-run edge collision cache
+# -------------------------------
+class EdgeCache:
+    """
+    Bounded LRU cache of edge collision results keyed on tree node-index
+    pairs. Edges are undirected, so (i, j) and (j, i) share an entry. Only
+    valid for a single planning run: indices mean nothing across trees.
+    `hits` and `misses` count lookups, so callers can see the saved work.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._free = OrderedDict()
+
+    def __len__(self):
+        return len(self._free)
+
+    def get(self, i, j):
+        key = (i, j) if i < j else (j, i)
+        free = self._free.get(key)
+        if free is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._free.move_to_end(key)
+        return free
+
+    def put(self, i, j, free):
+        key = (i, j) if i < j else (j, i)
+        self._free[key] = free
+        self._free.move_to_end(key)
+        if len(self._free) > self.max_entries:
+            self._free.popitem(last=False)
+
+    def segments_free(self, i, p_i, ids, points, obstacles):
+        """
+        Collision-free mask for the edges from node i at p_i to the nodes
+        `ids` at `points`. Cached edges are answered from the cache, the
+        rest are tested in one batch and stored.
+        """
+        free = np.empty(len(ids), dtype=bool)
+        unknown = []
+        for k, j in enumerate(ids.tolist()):
+            cached = self.get(i, j)
+            if cached is None:
+                unknown.append(k)
+            else:
+                free[k] = cached
+        if unknown:
+            tested = ~segments_collide(p_i, points[unknown], obstacles)
+            free[unknown] = tested
+            for k, f in zip(unknown, tested.tolist()):
+                self.put(i, int(ids[k]), f)
+        return free
@@ -0,0 +1,208 @@
+import math
+import os
+
+import numpy as np
+
+from planner.collision import as_obstacle_array
+
+# ------------------------------------------------
+#  Voxel occupancy map with a signed distance field
+# ------------------------------------------------
+# An optional alternative to ObstacleGrid for a fixed obstacle set. The
+# workspace is cut into cubic voxels of edge `resolution` and every voxel
+# stores the signed distance from its centre to the nearest box: positive
+# outside, negative inside. Outside the boxes the value is exact; inside it
+# is the depth in the deepest single box. It is built once with one
+# broadcast per box over the voxels within `max_distance` of that box, and
+# voxels farther from every box simply hold max_distance (pass None for an
+# untruncated field).
+#
+# Lookups are then plain array indexing. A point's clearance is read from
+# its voxel, so it is accurate to half a voxel diagonal (`tolerance`); the
+# free-space tests subtract that, and the distance between the samples on a
+# segment, so they are conservative: nothing reported free is closer than
+# `margin` to a box. With `margin` set to the drone radius the planners keep
+# that distance from every obstacle. An OccupancyGrid can be passed as
+# `obstacles` to the planners and to segment_collides / segments_collide,
+# like an ObstacleGrid, and can be saved and loaded to skip the build in
+# the next run (see occupancy_grid).
+
+
+def _check_margin(margin, max_distance):
+    # beyond max_distance the field only says "at least max_distance", so a
+    # margin that large would report every point as blocked
+    if max_distance is not None and margin >= max_distance:
+        raise ValueError(f"margin ({margin}) must be smaller than max_distance ({max_distance})")
+
+
+class OccupancyGrid:
+    def __init__(self, obstacles, min_x, max_x, min_y, max_y, min_z, max_z,
+                 resolution=0.1, margin=0.0, max_distance=1.0, _sdf=None):
+        _check_margin(margin, max_distance)
+        self.boxes = as_obstacle_array(obstacles)
+        self.bounds = (min_x, max_x, min_y, max_y, min_z, max_z)
+        self.resolution = resolution
+        self.margin = margin
+        self.max_distance = max_distance
+        self.tolerance = resolution * math.sqrt(3) / 2
+        self._lo = np.array([min_x, min_y, min_z], dtype=float)
+        self._hi = np.array([max_x, max_y, max_z], dtype=float)
+        self._origin = self._lo.tolist()
+        self._end = self._hi.tolist()
+        self.shape = tuple(np.maximum(np.ceil((self._hi - self._lo) / resolution), 1).astype(int).tolist())
+        self.sdf = self._build() if _sdf is None else _sdf
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _centers(self, axis):
+        return self._lo[axis] + (np.arange(self.shape[axis]) + 0.5) * self.resolution
+
+    def _build(self):
+        reach = np.inf if self.max_distance is None else self.max_distance
+        sdf = np.full(self.shape, reach, dtype=np.float32)
+        centers = [self._centers(axis) for axis in range(3)]
+        for box in self.boxes.tolist():
+            region = []
+            outside = []
+            inside = []
+            for axis, c in enumerate(centers):
+                lo, hi = box[2 * axis], box[2 * axis + 1]
+                first, last = np.searchsorted(c, [lo - reach, hi + reach])
+                if first >= last:
+                    break
+                c = c[first:last]
+                region.append(slice(first, last))
+                shape = [1, 1, 1]
+                shape[axis] = -1
+                outside.append(np.maximum(np.maximum(lo - c, c - hi), 0.0).reshape(shape))
+                inside.append(np.minimum(c - lo, hi - c).reshape(shape))
+            else:
+                distance = np.sqrt(outside[0]**2 + outside[1]**2 + outside[2]**2)
+                depth = np.minimum(np.minimum(inside[0], inside[1]), inside[2])
+                block = sdf[tuple(region)]
+                np.minimum(block, np.where(distance > 0.0, distance, -depth), out=block)
+        return sdf
+
+    def clearance(self, points):
+        """
+        Signed distance to the nearest box for each of the (M, 3) `points`,
+        read from their voxels. Points outside the grid get the value of the
+        nearest voxel minus their distance to the grid, a lower bound.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        inside = np.clip(points, self._lo, self._hi)
+        cells = np.floor((inside - self._lo) / self.resolution).astype(np.intp)
+        cells = np.minimum(cells, np.array(self.shape) - 1)
+        value = self.sdf[cells[:, 0], cells[:, 1], cells[:, 2]].astype(float)
+        return value - np.sqrt(((points - inside)**2).sum(axis=1))
+
+    def occupied(self, points):
+        """True for the `points` whose voxel centre lies inside a box."""
+        return self.clearance(points) <= 0.0
+
+    def points_free(self, points, margin=None):
+        """True for the `points` that are guaranteed farther than `margin`
+        (default: self.margin) from every box."""
+        margin = self.margin if margin is None else margin
+        return self.clearance(points) > margin + self.tolerance
+
+    def segments_hit(self, p_from, p_tos, margin=None):
+        """
+        Batched test of the segments p_from -> p_tos[i]: False only if the
+        whole segment is farther than `margin` (default: self.margin) from
+        every box. Samples are at most one voxel apart along each segment.
+        """
+        margin = self.margin if margin is None else margin
+        p_from = np.asarray(p_from, dtype=float)
+        p_tos = np.asarray(p_tos, dtype=float).reshape(-1, 3)
+        if len(p_tos) == 0:
+            return np.zeros(0, dtype=bool)
+        lengths = np.sqrt(((p_tos - p_from)**2).sum(axis=1))
+        steps = max(int(math.ceil(lengths.max() / self.resolution)), 1)
+        t = np.linspace(0.0, 1.0, steps + 1)
+        samples = p_from + (p_tos - p_from)[:, None, :] * t[None, :, None]
+        clearance = self.clearance(samples).reshape(len(p_tos), steps + 1)
+        # a point of the segment is at most half a step from a sample
+        needed = margin + self.tolerance + lengths / (2 * steps)
+        return (clearance <= needed[:, None]).any(axis=1)
+
+    def _clearance_at(self, point):
+        # scalar clearance() for the per-edge checks of the planners
+        cell = []
+        outside = 0.0
+        for c, lo, hi, n in zip(point, self._origin, self._end, self.shape):
+            if c < lo:
+                outside += (lo - c)**2
+                c = lo
+            elif c > hi:
+                outside += (c - hi)**2
+                c = hi
+            i = int((c - lo) / self.resolution)
+            cell.append(i if i < n else n - 1)
+        return float(self.sdf[cell[0], cell[1], cell[2]]) - math.sqrt(outside)
+
+    def segment_hits(self, p_from, p_to, margin=None):
+        margin = self.margin if margin is None else margin
+        x, y, z = p_from
+        dx, dy, dz = p_to[0] - x, p_to[1] - y, p_to[2] - z
+        length = math.sqrt(dx*dx + dy*dy + dz*dz)
+        steps = max(int(math.ceil(length / self.resolution)), 1)
+        if steps > 16:
+            return bool(self.segments_hit(p_from, [p_to], margin)[0])
+        needed = margin + self.tolerance + length / (2 * steps)
+        for k in range(steps + 1):
+            t = k / steps
+            if self._clearance_at((x + t*dx, y + t*dy, z + t*dz)) <= needed:
+                return True
+        return False
+
+    def matches(self, obstacles, min_x, max_x, min_y, max_y, min_z, max_z,
+                resolution=0.1, max_distance=1.0):
+        """True if this grid was built for exactly these obstacles and settings."""
+        boxes = as_obstacle_array(obstacles)
+        return (self.bounds == (min_x, max_x, min_y, max_y, min_z, max_z)
+                and self.resolution == resolution and self.max_distance == max_distance
+                and boxes.shape == self.boxes.shape and bool((boxes == self.boxes).all()))
+
+    def save(self, file):
+        """Write the grid to `file` as a compressed .npz."""
+        # through an open file, so no .npz is appended to other file names
+        if isinstance(file, (str, bytes, os.PathLike)):
+            with open(file, 'wb') as handle:
+                return self.save(handle)
+        np.savez_compressed(file, sdf=self.sdf, boxes=self.boxes,
+                            bounds=np.array(self.bounds, dtype=float),
+                            settings=np.array([self.resolution, self.margin,
+                                               np.nan if self.max_distance is None else self.max_distance]))
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            resolution, margin, max_distance = data['settings'].tolist()
+            return cls(data['boxes'], *data['bounds'].tolist(), resolution=resolution, margin=margin,
+                       max_distance=None if math.isnan(max_distance) else max_distance,
+                       _sdf=data['sdf'])
+
+
+def occupancy_grid(obstacles, min_x, max_x, min_y, max_y, min_z, max_z,
+                   resolution=0.1, margin=0.0, max_distance=1.0, cache_file=None):
+    """
+    OccupancyGrid for `obstacles`. With `cache_file` the grid stored there is
+    reused if it was built for the same obstacles and settings; otherwise
+    the grid is built and written to it.
+    """
+    _check_margin(margin, max_distance)
+    bounds = (min_x, max_x, min_y, max_y, min_z, max_z)
+    if cache_file is not None:
+        try:
+            grid = OccupancyGrid.load(cache_file)
+        except (OSError, KeyError, ValueError):
+            grid = None
+        if grid is not None and grid.matches(obstacles, *bounds, resolution, max_distance):
+            grid.margin = margin
+            return grid
+    grid = OccupancyGrid(obstacles, *bounds, resolution=resolution, margin=margin, max_distance=max_distance)
+    if cache_file is not None:
+        grid.save(cache_file)
+    return grid
@@ -0,0 +1,110 @@
+import numpy as np
+
+from planner.collision import as_obstacle_array, segment_hits_boxes, segments_hit_boxes
+from planner.sampling import make_rng
+
+# ------------------------------------------
+#  Path shortcutting and waypoint decimation
+# ------------------------------------------
+# The planners return every tree vertex on the way to the goal, expand_dist
+# apart. These functions reduce that to the few waypoints a controller needs,
+# using the same exact segment tests as the planners. Start and goal are
+# always kept, and a consecutive pair of the input path is never replaced by
+# anything but a collision-free segment, so the output is valid whenever the
+# input was. `clearance` grows every box on all sides for the new segments,
+# which keeps shortcuts from grazing obstacle corners; where the input path
+# itself runs closer than that, shortcuts fall back to the exact boxes.
+
+
+def _boxes(obstacles, clearance):
+    # ObstacleGrid and OccupancyGrid keep the boxes they were built from
+    boxes = as_obstacle_array(getattr(obstacles, 'boxes', obstacles))
+    if clearance:
+        boxes = boxes + np.array([-clearance, clearance] * 3)
+    return boxes
+
+
+def shortcut_path(path, obstacles, clearance=0.0):
+    """
+    Greedy shortcutting: from each kept waypoint jump to the farthest later
+    waypoint it can see in a straight line. All candidate segments from one
+    waypoint are tested in a single batch.
+    """
+    points = np.asarray(path, dtype=float)
+    if len(points) < 3:
+        return [tuple(p) for p in points.tolist()]
+    exact = _boxes(obstacles, 0.0)
+    inflated = _boxes(obstacles, clearance) if clearance else None
+    keep = [0]
+    i = 0
+    while i < len(points) - 1:
+        free = np.flatnonzero(~segments_hit_boxes(points[i], points[i + 2:], exact))
+        if inflated is not None and len(free):
+            # Prefer shortcuts that keep the clearance, if there are any.
+            wide = free[~segments_hit_boxes(points[i], points[i + 2:][free], inflated)]
+            if len(wide):
+                free = wide
+        i = i + 2 + int(free[-1]) if len(free) else i + 1
+        keep.append(i)
+    return [tuple(p) for p in points[keep].tolist()]
+
+
+def random_shortcuts(path, obstacles, iterations=100, clearance=0.0, seed=None):
+    """
+    Randomised shortcutting: pick two points anywhere along the path (not
+    only at waypoints) and connect them directly if the segment is free.
+    Catches the corner cuts that waypoint-to-waypoint shortcuts cannot.
+    """
+    points = np.asarray(path, dtype=float)
+    boxes = _boxes(obstacles, clearance)
+    rng = make_rng(seed)
+    for _ in range(iterations):
+        if len(points) < 3:
+            break
+        lengths = np.sqrt(((points[1:] - points[:-1])**2).sum(axis=1))
+        arc = np.concatenate([[0.0], np.cumsum(lengths)])
+        s1, s2 = np.sort(rng.uniform(0.0, arc[-1], size=2))
+        i1 = min(int(np.searchsorted(arc, s1, side='right')) - 1, len(lengths) - 1)
+        i2 = min(int(np.searchsorted(arc, s2, side='right')) - 1, len(lengths) - 1)
+        if i2 - i1 < 1:
+            continue
+        a = points[i1] + (points[i1 + 1] - points[i1]) * ((s1 - arc[i1]) / max(lengths[i1], 1e-12))
+        b = points[i2] + (points[i2 + 1] - points[i2]) * ((s2 - arc[i2]) / max(lengths[i2], 1e-12))
+        if segment_hits_boxes(a, b, boxes):
+            continue
+        points = np.concatenate([points[:i1 + 1], [a, b], points[i2 + 1:]])
+    return [tuple(p) for p in points.tolist()]
+
+
+def decimate_path(path, obstacles=None, tolerance=1e-3, clearance=0.0):
+    """
+    Drop waypoints that lie within `tolerance` of the straight line between
+    their neighbours. With `obstacles`, a waypoint is only dropped if that
+    line is also free.
+    """
+    points = [np.asarray(p, dtype=float) for p in path]
+    boxes = None if obstacles is None else _boxes(obstacles, clearance)
+    kept = points[:1]
+    for k in range(1, len(points) - 1):
+        a, p, b = kept[-1], points[k], points[k + 1]
+        ab = b - a
+        t = np.clip(np.dot(p - a, ab) / max(np.dot(ab, ab), 1e-24), 0.0, 1.0)
+        off_line = np.linalg.norm(a + t * ab - p) > tolerance
+        if off_line or (boxes is not None and segment_hits_boxes(a, b, boxes)):
+            kept.append(p)
+    if len(points) > 1:
+        kept.append(points[-1])
+    return [tuple(p.tolist()) for p in kept]
+
+
+def simplify_path(path, obstacles, clearance=0.0, iterations=0, seed=None, tolerance=1e-3):
+    """
+    Greedy shortcuts, then `iterations` random shortcuts, then collinear
+    decimation. Returns the reduced waypoint list, or None for None.
+    """
+    if path is None:
+        return None
+    path = shortcut_path(path, obstacles, clearance)
+    if iterations:
+        path = random_shortcuts(path, obstacles, iterations, clearance, seed)
+    return decimate_path(path, obstacles, tolerance, clearance)
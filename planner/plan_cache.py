@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+# ----------------------------------------
+#  Content-addressed on-disk plan cache
+# ----------------------------------------
+# A planned path is stored under the SHA-256 of everything that decides it:
+# the obstacle array (its exact float64 bytes), start, goal, bounds, the
+# planner parameters and the seed. Same inputs, same file, so a scenario that
+# was planned before is read back instead of planned again, and any change to
+# the inputs simply misses. Paths are stored as (N, 3) float64 .npy files; a
+# failed plan of a seeded run is stored as an empty array, since finding no
+# path costs the full max_iter. Without a seed a failure is only bad luck of
+# that one run, so it is never stored (lookup(..., cache_failures=False)),
+# while a path found is still valid and is kept. Reading a file touches its
+# modification time, and when the folder grows past max_bytes the least
+# recently used files are removed.
+# Bump CACHE_VERSION when a planner change makes old paths invalid.
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".plan_cache")
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+def _seed_token(seed):
+    if isinstance(seed, np.random.SeedSequence):
+        return ["SeedSequence", str(seed.entropy), list(seed.spawn_key)]
+    if seed is None or isinstance(seed, (int, np.integer)):
+        return seed if seed is None else int(seed)
+    raise TypeError(f"cannot cache plans for a seed of type {type(seed).__name__}")
+
+
+def plan_key(obstacles, start, goal, bounds, params, seed=None):
+    """
+    Hex key of one planning problem. `bounds` is (min_x, max_x, min_y, max_y,
+    min_z, max_z), `params` a dict of JSON-serialisable planner settings and
+    `seed` None, an int or a SeedSequence.
+    """
+    obstacles = np.ascontiguousarray(obstacles, dtype=np.float64).reshape(-1, 6)
+    header = json.dumps({'version': CACHE_VERSION,
+                         'start': [float(v) for v in start],
+                         'goal': [float(v) for v in goal],
+                         'bounds': [float(v) for v in bounds],
+                         'params': params,
+                         'seed': _seed_token(seed)}, sort_keys=True)
+    digest = hashlib.sha256(header.encode())
+    digest.update(obstacles.tobytes())
+    return digest.hexdigest()
+
+
+class PlanCache:
+
+    def __init__(self, folder=DEFAULT_CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.folder, key + ".npy")
+
+    def get(self, key):
+        """
+        (found, path): the cached path as a list of (x, y, z) tuples, or None
+        for a cached failure. found is False on a miss.
+        """
+        if not self.enabled:
+            return False, None
+        file = self._file(key)
+        try:
+            points = np.load(file)
+            os.utime(file)
+        except (OSError, ValueError):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        if len(points) == 0:
+            return True, None
+        return True, [tuple(p) for p in points.tolist()]
+
+    def put(self, key, path):
+        if not self.enabled:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        points = np.asarray(path if path is not None else [], dtype=np.float64).reshape(-1, 3)
+        # written next to the final name and renamed, so a reader never sees
+        # half a file, also with several processes sharing the folder
+        handle, temp = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                np.save(file, points)
+            os.replace(temp, self._file(key))
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(file)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def invalidate(self, key=None):
+        """Remove the entry for `key`, or every entry if no key is given."""
+        if key is not None:
+            files = [self._file(key)]
+        elif os.path.isdir(self.folder):
+            files = [entry.path for entry in os.scandir(self.folder) if entry.name.endswith((".npy", ".tmp"))]
+        else:
+            files = []
+        for file in files:
+            try:
+                os.unlink(file)
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, key, plan, cache_failures=True):
+        """
+        The cached path for `key`, or plan() stored under `key` on a miss. A
+        None result is only stored if `cache_failures` is set.
+        """
+        found, path = self.get(key)
+        if not found:
+            path = plan()
+            if path is not None or cache_failures:
+                self.put(key, path)
+        return path
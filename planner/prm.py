@@ -0,0 +1,257 @@
+import heapq
+import json
+import math
+import os
+
+import numpy as np
+
+from planner.collision import as_obstacle_array, obstacle_grid, segments_collide
+from planner.sampling import make_rng
+from planner.spatial_index import GridIndex
+
+# ------------------------------------------------
+#  Multi-query PRM: build a roadmap once, query it
+# ------------------------------------------------
+# For many start/goal pairs in the same obstacle set. The roadmap is built
+# once: `num_samples` points drawn in one batch over the bounds (those inside
+# a box are dropped), each connected to its `k` nearest neighbours within
+# `radius`, with all candidate edges of a node validated in one batched
+# segment test. The graph is kept in CSR form (indptr / indices / weights),
+# which is also what is written to disk, so a saved roadmap loads with no
+# rebuilding. A query links start and goal to their nearest visible roadmap
+# nodes and runs A* with the straight-line distance as heuristic, so after
+# the build a query costs a few milliseconds.
+#
+#     roadmap = prm_roadmap(obstacles, min_x, ..., max_z, seed=0,
+#                           cache_file="roadmap.npz")
+#     path = roadmap.query(start, goal)
+
+
+# seed token of a roadmap that cannot be rebuilt from its seed (a Generator
+# or anything else make_rng accepts), so it never matches a later request
+_UNREPEATABLE = "unrepeatable"
+
+
+def _seed_token(seed):
+    # JSON-comparable form of a build seed: None, an int or a SeedSequence
+    if isinstance(seed, np.random.SeedSequence):
+        return ["SeedSequence", str(seed.entropy), list(seed.spawn_key)]
+    if seed is None or isinstance(seed, (int, np.integer)):
+        return seed if seed is None else int(seed)
+    return _UNREPEATABLE
+
+
+class Roadmap:
+    def __init__(self, points, indptr, indices, weights, boxes,
+                 min_x, max_x, min_y, max_y, min_z, max_z, k=10, radius=None, obstacles=None,
+                 settings=None):
+        self.points = points
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        # the boxes the edges were validated against; queries connect with
+        # `obstacles` (a prebuilt grid of them) if given
+        self.boxes = as_obstacle_array(boxes)
+        self.bounds = (min_x, max_x, min_y, max_y, min_z, max_z)
+        self.k = k
+        self.radius = radius
+        # the build arguments (num_samples, k, radius, seed) as passed to
+        # build, compared by prm_roadmap before a saved roadmap is reused
+        self.settings = settings
+        self.obstacles = obstacle_grid(self.boxes if obstacles is None else obstacles, *self.bounds)
+        # plain lists are much faster to walk in the A* loop than arrays
+        self._adjacency = None
+
+    def __len__(self):
+        return len(self.points)
+
+    @classmethod
+    def build(cls, obstacles, min_x, max_x, min_y, max_y, min_z, max_z,
+              num_samples=2000, k=10, radius=None, seed=None):
+        """
+        Sample the roadmap nodes and validate their edges. `radius` defaults
+        to twice the spacing at which `k` neighbours are expected.
+        """
+        bounds = (min_x, max_x, min_y, max_y, min_z, max_z)
+        settings = {'num_samples': num_samples, 'k': k, 'radius': radius, 'seed': _seed_token(seed)}
+        obstacles = obstacle_grid(obstacles, *bounds)
+        lo = np.array([min_x, min_y, min_z], dtype=float)
+        hi = np.array([max_x, max_y, max_z], dtype=float)
+        points = make_rng(seed).uniform(lo, hi, size=(num_samples, 3))
+        boxes = as_obstacle_array(getattr(obstacles, 'boxes', obstacles))
+        blocked = np.zeros(len(points), dtype=bool)
+        for start in range(0, len(boxes), 64):
+            chunk = boxes[start:start + 64]
+            blocked |= ((points[:, None, :] >= chunk[None, :, 0::2])
+                        & (points[:, None, :] <= chunk[None, :, 1::2])).all(axis=2).any(axis=1)
+        points = points[~blocked]
+        if radius is None:
+            volume = float(np.prod(hi - lo))
+            radius = 2 * (3 * k * volume / (4 * math.pi * max(len(points), 1))) ** (1 / 3)
+
+        index = GridIndex(*bounds, capacity=max(len(points), 1))
+        for p in points.tolist():
+            index.insert(p)
+        sources, targets, weights = [], [], []
+        for i, p in enumerate(points.tolist()):
+            # only neighbours with a higher index, so every edge is tested once
+            near = index.within(p, radius)
+            near = near[near > i]
+            if len(near) == 0:
+                continue
+            d = np.sqrt(((points[near] - p) ** 2).sum(axis=1))
+            if len(near) > k:
+                keep = np.argpartition(d, k)[:k]
+                near, d = near[keep], d[keep]
+            free = ~segments_collide(p, points[near], obstacles)
+            sources.append(np.full(int(free.sum()), i))
+            targets.append(near[free])
+            weights.append(d[free])
+        indptr, indices, weights = _csr(len(points), sources, targets, weights)
+        return cls(points, indptr, indices, weights, boxes, *bounds, k=k, radius=radius, obstacles=obstacles,
+                   settings=settings)
+
+    def _links(self, point):
+        # nearest roadmap nodes within radius (at most 2k) that `point` can
+        # see in a straight line, and their distances
+        d = np.sqrt(((self.points - np.asarray(point, dtype=float)) ** 2).sum(axis=1))
+        near = np.flatnonzero(d < self.radius)
+        if len(near) > 2 * self.k:
+            near = near[np.argpartition(d[near], 2 * self.k)[:2 * self.k]]
+        free = ~segments_collide(point, self.points[near], self.obstacles)
+        return near[free], d[near[free]]
+
+    def query(self, start, goal):
+        """
+        Shortest roadmap path from `start` to `goal` as a list of (x, y, z)
+        tuples that begins with start and ends with goal, or None.
+        """
+        start = (start[0], start[1], start[2])
+        goal = (goal[0], goal[1], goal[2])
+        if not segments_collide(start, [goal], self.obstacles)[0]:
+            return [start, goal]
+        start_ids, start_d = self._links(start)
+        goal_ids, goal_d = self._links(goal)
+        if len(start_ids) == 0 or len(goal_ids) == 0:
+            return None
+        nodes = self._astar(start_ids, start_d, dict(zip(goal_ids.tolist(), goal_d.tolist())), goal)
+        if nodes is None:
+            return None
+        return [start] + [tuple(p) for p in self.points[nodes].tolist()] + [goal]
+
+    def _astar(self, start_ids, start_d, goal_links, goal):
+        points = self.points
+        h = np.sqrt(((points - np.asarray(goal, dtype=float)) ** 2).sum(axis=1)).tolist()
+        if self._adjacency is None:
+            self._adjacency = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        indptr, indices, weights = self._adjacency
+        cost = {}
+        came_from = {}
+        heap = []
+        for i, d in zip(start_ids.tolist(), start_d.tolist()):
+            if d < cost.get(i, math.inf):
+                cost[i] = d
+                came_from[i] = -1
+                heapq.heappush(heap, (d + h[i], d, i))
+        # the goal is reached through goal_links; the search stops once no
+        # open node can still lead to a shorter path than the best found
+        best, last = math.inf, None
+        closed = set()
+        while heap:
+            f, g, i = heapq.heappop(heap)
+            if f >= best:
+                break
+            if i in closed:
+                continue
+            closed.add(i)
+            if i in goal_links and g + goal_links[i] < best:
+                best, last = g + goal_links[i], i
+            for e in range(indptr[i], indptr[i + 1]):
+                j = indices[e]
+                c = g + weights[e]
+                if c < cost.get(j, math.inf):
+                    cost[j] = c
+                    came_from[j] = i
+                    heapq.heappush(heap, (c + h[j], c, j))
+        if last is None:
+            return None
+        nodes = []
+        while last >= 0:
+            nodes.append(last)
+            last = came_from[last]
+        nodes.reverse()
+        return nodes
+
+    def save(self, file):
+        """Write the roadmap, with its obstacles and settings, to `file` (.npz)."""
+        # through an open file, so no .npz is appended to other file names
+        if isinstance(file, (str, bytes, os.PathLike)):
+            with open(file, 'wb') as handle:
+                return self.save(handle)
+        np.savez_compressed(file, points=self.points, indptr=self.indptr, indices=self.indices,
+                            weights=self.weights, boxes=self.boxes,
+                            bounds=np.array(self.bounds, dtype=float),
+                            settings=np.array([self.k, self.radius], dtype=float),
+                            build=np.array(json.dumps(self.settings)))
+
+    @classmethod
+    def load(cls, file, obstacles=None):
+        """
+        Roadmap saved in `file`. Its edges were validated against the boxes
+        stored with it; `obstacles` (e.g. a prebuilt grid of the same boxes)
+        is only used for the query connections.
+        """
+        with np.load(file) as data:
+            k, radius = data['settings'].tolist()
+            return cls(data['points'], data['indptr'], data['indices'], data['weights'], data['boxes'],
+                       *data['bounds'].tolist(), k=int(k), radius=radius, obstacles=obstacles,
+                       settings=json.loads(str(data['build'])))
+
+    def matches(self, obstacles, min_x, max_x, min_y, max_y, min_z, max_z,
+                num_samples=2000, k=10, radius=None, seed=None):
+        """True if this roadmap was built for exactly these obstacles and settings."""
+        boxes = as_obstacle_array(getattr(obstacles, 'boxes', obstacles))
+        settings = {'num_samples': num_samples, 'k': k, 'radius': radius, 'seed': _seed_token(seed)}
+        if settings['seed'] == _UNREPEATABLE or (self.settings or {}).get('seed') == _UNREPEATABLE:
+            return False
+        return (self.bounds == (min_x, max_x, min_y, max_y, min_z, max_z)
+                and self.settings == json.loads(json.dumps(settings))
+                and boxes.shape == self.boxes.shape and bool((boxes == self.boxes).all()))
+
+
+def _csr(n, sources, targets, weights):
+    # undirected edge lists -> CSR adjacency with both directions
+    if sources:
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        weights = np.concatenate(weights)
+    else:
+        sources = targets = np.zeros(0, dtype=np.intp)
+        weights = np.zeros(0)
+    rows = np.concatenate([sources, targets])
+    cols = np.concatenate([targets, sources])
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.intp), np.concatenate([weights, weights])[order]
+
+
+def prm_roadmap(obstacles, min_x, max_x, min_y, max_y, min_z, max_z,
+                num_samples=2000, k=10, radius=None, seed=None, cache_file=None):
+    """
+    Roadmap for `obstacles`. With `cache_file` a roadmap stored there is
+    reused if it was built for the same boxes, bounds and build settings;
+    otherwise it is built and written to it.
+    """
+    bounds = (min_x, max_x, min_y, max_y, min_z, max_z)
+    if cache_file is not None:
+        try:
+            roadmap = Roadmap.load(cache_file, obstacles)
+        except (OSError, KeyError, ValueError):
+            roadmap = None
+        if roadmap is not None and roadmap.matches(obstacles, *bounds, num_samples, k, radius, seed):
+            return roadmap
+    roadmap = Roadmap.build(obstacles, *bounds, num_samples=num_samples, k=k, radius=radius, seed=seed)
+    if cache_file is not None:
+        roadmap.save(cache_file)
+    return roadmap
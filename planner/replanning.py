@@ -0,0 +1,126 @@
+import numpy as np
+
+from planner.collision import as_obstacle_array, obstacle_grid, segment_hits_boxes
+from planner.rrt_3d_planner import backtrace_path, check_collision, distance, steer
+from planner.sampling import Sampler
+from planner.spatial_index import GridIndex
+from planner.tree import Tree
+
+# -------------------------------------------------
+#  Dynamic RRT: replanning that keeps the old tree
+# -------------------------------------------------
+# The tree grown by one plan() call is kept for the next. When the obstacle
+# set changes, only the boxes that are new (added, or moved to a new place)
+# can make existing edges collide; boxes that disappeared only free space.
+# For every new box the tree is asked for the nodes within reach of it (its
+# half diagonal plus the longest edge), the edges from those nodes to their
+# parents are tested against the new boxes alone, and the subtree below every
+# edge that now collides is pruned. Growth then continues from what is left
+# with the goal-biased RRT step of rrt_planning, except that a share
+# (`cache_sample_rate`) of the samples is drawn from the positions of the
+# pruned nodes: the cut-off branch marks a corridor that led to the goal, so
+# the tree regrows along it around the new box instead of exploring the
+# whole map again. A replan therefore costs about as much as the part of the
+# tree near the change, and if the old path survived the pruning it is
+# returned without growing at all.
+#
+#     planner = DynamicRRT(start, goal, obstacles, min_x, ..., max_z,
+#                          expand_dist=0.1, goal_tolerance=0.05, seed=0)
+#     path = planner.plan(max_iter=10000)
+#     path = planner.replan(changed_obstacles, max_iter=10000)
+
+
+def _box_rows(boxes):
+    return {tuple(row) for row in boxes.tolist()}
+
+
+class DynamicRRT:
+    def __init__(self, start, goal, obstacles,
+                 min_x, max_x, min_y, max_y, min_z, max_z,
+                 expand_dist=1.0, goal_sample_rate=0.05, goal_tolerance=1.0,
+                 cache_sample_rate=0.3, spatial_index=GridIndex, seed=None):
+        self.goal = goal
+        self.bounds = (min_x, max_x, min_y, max_y, min_z, max_z)
+        self.expand_dist = expand_dist
+        self.goal_tolerance = goal_tolerance
+        self.tree = Tree(start, *self.bounds, spatial_index=spatial_index)
+        self.sampler = Sampler(*self.bounds, goal, goal_sample_rate, seed)
+        self.cache_sample_rate = cache_sample_rate
+        self.rng = np.random.default_rng(self.sampler.rng.integers(2**63))
+        # positions of the nodes pruned by the last update_obstacles call
+        self.waypoint_cache = np.empty((0, 3))
+        self.boxes = as_obstacle_array(obstacles).copy()
+        self.obstacles = obstacle_grid(self.boxes, *self.bounds)
+        # nodes within goal_tolerance, checked first by every plan() call
+        self.goal_nodes = []
+        self.pruned = 0
+
+    def plan(self, max_iter=1000):
+        """
+        Path from the start to the goal, growing the current tree for at most
+        `max_iter` iterations if it has no live goal node yet; None if none
+        is found.
+        """
+        tree = self.tree
+        self.goal_nodes = [i for i in self.goal_nodes if np.isfinite(tree.cost[i])]
+        if self.goal_nodes:
+            return backtrace_path(tree, self.goal_nodes[0], self.goal)
+        for _ in range(max_iter):
+            rnd_point = self._sample()
+            nearest_index = tree.nearest(rnd_point)
+
+            new_point = steer(tree, nearest_index, rnd_point, self.expand_dist)
+            if check_collision(tree.point(nearest_index), new_point, self.obstacles):
+                new_index = tree.add(new_point, nearest_index)
+
+                if distance(new_point, self.goal) < self.goal_tolerance:
+                    self.goal_nodes.append(new_index)
+                    self.waypoint_cache = self.waypoint_cache[:0]
+                    return backtrace_path(tree, new_index, self.goal)
+        return None
+
+    def _sample(self):
+        cache = self.waypoint_cache
+        if len(cache) and self.rng.random() < self.cache_sample_rate:
+            x, y, z = cache[self.rng.integers(len(cache))].tolist()
+            return (x, y, z)
+        return self.sampler.sample()
+
+    def update_obstacles(self, obstacles):
+        """
+        Switch to a new obstacle set and prune the subtrees behind every edge
+        that one of the new boxes blocks. Returns the number of nodes removed.
+        """
+        boxes = as_obstacle_array(obstacles).copy()
+        old = _box_rows(self.boxes)
+        added = np.array([row for row in boxes.tolist() if tuple(row) not in old]).reshape(-1, 6)
+        self.boxes = boxes
+        self.obstacles = obstacle_grid(boxes, *self.bounds)
+        if len(added) == 0:
+            return 0
+
+        tree = self.tree
+        centers = (added[:, 0::2] + added[:, 1::2]) / 2
+        reach = np.linalg.norm(added[:, 1::2] - added[:, 0::2], axis=1) / 2 + self.expand_dist + 1e-9
+        near = np.unique(np.concatenate([tree.within(c, r) for c, r in zip(centers.tolist(), reach.tolist())]))
+
+        removed = []
+        for node in near.tolist():
+            parent = tree.parent[node]
+            # the root cannot be pruned, and a node may already have gone
+            # with the subtree of an ancestor
+            if parent < 0 or not np.isfinite(tree.cost[node]):
+                continue
+            if segment_hits_boxes(tree.point(parent), tree.point(node), added):
+                removed.append(tree.xyz[tree.subtree(node)])
+                tree.prune(node)
+        if not removed:
+            return 0
+        self.waypoint_cache = np.concatenate(removed)
+        self.pruned += len(self.waypoint_cache)
+        return len(self.waypoint_cache)
+
+    def replan(self, obstacles, max_iter=1000):
+        """update_obstacles followed by plan."""
+        self.update_obstacles(obstacles)
+        return self.plan(max_iter)
@@ -0,0 +1,107 @@
+import math
+
+from planner.collision import obstacle_grid, segment_collides
+from planner.rrt_3d_planner import distance
+from planner.sampling import Sampler
+from planner.spatial_index import GridIndex
+from planner.tree import Tree
+
+# ----------------------------------------------
+#  RRT-Connect: bidirectional RRT with greedy joins
+# ----------------------------------------------
+# Same call signature and path output as rrt_planning. One tree grows from
+# the start and one from the goal; after every extension the other tree
+# tries to connect to the new node in a straight line. Because both trees
+# meet exactly, the path always ends on the goal itself, so
+# `goal_tolerance` and `goal_sample_rate` are only accepted for
+# compatibility with rrt_planning.
+
+
+def steer_to(tree, from_index, to_point, expand_dist):
+    """
+    Like steer, but lands exactly on `to_point` when it is within reach.
+    Returns the new point and whether it reached `to_point`.
+    """
+    fx, fy, fz = tree.point(from_index)
+    dx = to_point[0] - fx
+    dy = to_point[1] - fy
+    dz = to_point[2] - fz
+    dist = math.sqrt(dx*dx + dy*dy + dz*dz)
+    if dist <= expand_dist:
+        return (to_point[0], to_point[1], to_point[2]), True
+    return (fx + expand_dist * dx / dist,
+            fy + expand_dist * dy / dist,
+            fz + expand_dist * dz / dist), False
+
+def extend(tree, point, expand_dist, obstacles):
+    """
+    One RRT step of `tree` towards `point`. Returns the new node index (or
+    None if the step collides) and whether `point` was reached.
+    """
+    nearest_index = tree.nearest(point)
+    new_point, reached = steer_to(tree, nearest_index, point, expand_dist)
+    if segment_collides(tree.point(nearest_index), new_point, obstacles):
+        return None, False
+    return tree.add(new_point, nearest_index), reached
+
+def connect(tree, point, expand_dist, obstacles):
+    """
+    Repeat `extend` towards `point` until it is reached or blocked.
+    Returns the last node index added (or None) and whether it reached.
+    """
+    last = None
+    while True:
+        index, reached = extend(tree, point, expand_dist, obstacles)
+        if index is None:
+            return last, False
+        last = index
+        if reached:
+            return last, True
+
+def join_path(start_tree, start_index, goal_tree, goal_index):
+    """
+    Path from the start root to the goal root through the two meeting nodes.
+    The meeting nodes share a position, so the goal-side copy is dropped.
+    """
+    path = [start_tree.point(i) for i in start_tree.path_to(start_index)]
+    goal_side = [goal_tree.point(i) for i in goal_tree.path_to(goal_index)]
+    goal_side.reverse()
+    return path + goal_side[1:]
+
+def rrt_connect_planning(start, goal, obstacles,
+                         min_x, max_x, min_y, max_y, min_z, max_z,
+                         expand_dist=1.0, goal_sample_rate=0.05,
+                         max_iter=1000, goal_tolerance=1.0, spatial_index=GridIndex, seed=None,
+                         stats=None):
+    start_tree = Tree(start, min_x, max_x, min_y, max_y, min_z, max_z, spatial_index=spatial_index)
+    goal_tree = Tree(goal, min_x, max_x, min_y, max_y, min_z, max_z, spatial_index=spatial_index)
+    sampler = Sampler(min_x, max_x, min_y, max_y, min_z, max_z, goal, 0.0, seed)
+    obstacles = obstacle_grid(obstacles, min_x, max_x, min_y, max_y, min_z, max_z)
+
+    path = None
+    if not segment_collides(start, goal, obstacles) and distance(start, goal) <= expand_dist:
+        path = [start_tree.point(0), goal_tree.point(0)]
+        max_iter = 0
+
+    tree_a, tree_b = start_tree, goal_tree
+    for _ in range(max_iter):
+        rnd_point = sampler.sample()
+        new_index, _ = extend(tree_a, rnd_point, expand_dist, obstacles)
+        if new_index is not None:
+            new_point = tree_a.point(new_index)
+            other_index, reached = connect(tree_b, new_point, expand_dist, obstacles)
+            if reached:
+                if tree_a is start_tree:
+                    path = join_path(start_tree, new_index, goal_tree, other_index)
+                else:
+                    path = join_path(start_tree, other_index, goal_tree, new_index)
+                break
+        # Grow the smaller tree next
+        if len(tree_b) < len(tree_a):
+            tree_a, tree_b = tree_b, tree_a
+
+    if stats is not None:
+        if path is not None:
+            stats.solved(sampler)
+        stats.finish(sampler, start_tree, goal_tree)
+    return path
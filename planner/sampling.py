@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+
+# --------------------------------------
+#  Block-generated, seedable sample stream
+# --------------------------------------
+# Every planning call owns its own numpy Generator, so runs are repeatable
+# from a seed and never share RNG state with other runs or processes.
+
+
+def make_rng(seed=None):
+    """
+    Generator for `seed`: None (fresh entropy), an int, a SeedSequence or an
+    existing Generator, which is used as is.
+    """
+    return np.random.default_rng(seed)
+
+
+def spawn_seeds(seed, n):
+    """
+    `n` statistically independent SeedSequences derived from `seed`, one per
+    worker or trial. Safe to send to other processes.
+    """
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+class Sampler:
+    """
+    Uniform samples over the bounds, drawn `block_size` at a time. Goal
+    biasing is applied to the whole block at once: with probability
+    `goal_sample_rate` an entry is replaced by the goal.
+
+    After `focus(start, goal, c_best)` samples are drawn uniformly from the
+    part of the prolate spheroid {x : |x - start| + |x - goal| <= c_best}
+    inside the bounds (informed sampling): no other sample can lie on a
+    path shorter than c_best.
+    """
+
+    def __init__(self, min_x, max_x, min_y, max_y, min_z, max_z,
+                 goal, goal_sample_rate, seed=None, block_size=1024):
+        self.rng = make_rng(seed)
+        self.lo = np.array([min_x, min_y, min_z], dtype=float)
+        self.hi = np.array([max_x, max_y, max_z], dtype=float)
+        self.goal = (goal[0], goal[1], goal[2])
+        self.goal_sample_rate = goal_sample_rate
+        self.block_size = block_size
+        self._block = []
+        self._pos = 0
+        self._drawn = 0
+        self._center = None
+        self._transform = None
+
+    def focus(self, start, goal, c_best):
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        c_min = float(np.linalg.norm(goal - start))
+        if not np.isfinite(c_best) or c_min < 1e-12:
+            self._center = self._transform = None
+        else:
+            # Rotation taking the x axis onto the start -> goal direction.
+            a1 = (goal - start) / c_min
+            u, _, vt = np.linalg.svd(np.outer(a1, [1.0, 0.0, 0.0]))
+            rotation = u @ np.diag([1.0, 1.0, np.linalg.det(u) * np.linalg.det(vt)]) @ vt
+            r1 = c_best / 2.0
+            r2 = math.sqrt(max(c_best * c_best - c_min * c_min, 0.0)) / 2.0
+            self._center = (start + goal) / 2.0
+            self._transform = rotation @ np.diag([r1, r2, r2])
+        # Samples drawn for the old region are dropped.
+        self._drawn -= len(self._block) - self._pos
+        self._block = []
+        self._pos = 0
+
+    def _draw_uniform(self, n):
+        if self._transform is None:
+            return self.rng.uniform(self.lo, self.hi, size=(n, 3))
+        # Uniform in the unit ball, mapped onto the spheroid; points outside
+        # the bounds are rejected and the rest topped up.
+        points = np.empty((0, 3))
+        for _ in range(64):
+            ball = self.rng.standard_normal((2 * n, 3))
+            ball *= (self.rng.random(2 * n) ** (1.0 / 3.0) / np.linalg.norm(ball, axis=1))[:, None]
+            drawn = ball @ self._transform.T + self._center
+            inside = np.all((drawn >= self.lo) & (drawn <= self.hi), axis=1)
+            points = np.concatenate([points, drawn[inside]])
+            if len(points) >= n:
+                return points[:n]
+        # The spheroid barely overlaps the bounds: top up with plain samples.
+        return np.concatenate([points, self.rng.uniform(self.lo, self.hi, size=(n - len(points), 3))])
+
+    def _draw(self, n):
+        points = self._draw_uniform(n)
+        points[self.rng.random(n) < self.goal_sample_rate] = self.goal
+        return points
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pos == len(self._block):
+            self._block = [tuple(p) for p in self._draw(self.block_size).tolist()]
+            self._pos = 0
+            self._drawn += self.block_size
+        point = self._block[self._pos]
+        self._pos += 1
+        return point
+
+    def sample(self):
+        return next(self)
+
+    @property
+    def count(self):
+        """
+        Number of samples handed out so far.
+        """
+        return self._drawn - (len(self._block) - self._pos)
@@ -0,0 +1,209 @@
+import math
+
+import numpy as np
+
+# ----------------------------------------------------
+#  Spatial indexes for nearest-node lookup in the tree
+# ----------------------------------------------------
+# Every index stores the tree vertices itself and hands out the insertion
+# order as node index, so a planner can keep `index.insert(...)` in lockstep
+# with its own node storage. All indexes share the same constructor signature
+# so they can be swapped with the `spatial_index` argument of the planners.
+# A removed point keeps its index number (so the numbering stays in lockstep)
+# but its coordinates become infinite and queries never return it again.
+
+
+class LinearIndex:
+    """
+    Brute-force index: one vectorised distance pass over all stored points.
+    Fast enough for small trees and used as the reference implementation.
+    """
+
+    def __init__(self, min_x, max_x, min_y, max_y, min_z, max_z, capacity=1024):
+        self._xyz = np.empty((capacity, 3))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def points(self):
+        return self._xyz[:self._size]
+
+    def point(self, i):
+        x, y, z = self._xyz[i].tolist()
+        return (x, y, z)
+
+    def insert(self, point):
+        if self._size == len(self._xyz):
+            self._xyz = np.concatenate([self._xyz, np.empty_like(self._xyz)])
+        self._xyz[self._size] = point[0], point[1], point[2]
+        self._size += 1
+        return self._size - 1
+
+    def remove(self, i):
+        self._xyz[i] = np.inf
+
+    def nearest(self, point):
+        d2 = ((self.points - np.asarray(point, dtype=float)) ** 2).sum(axis=1)
+        return int(np.argmin(d2))
+
+    def within(self, point, radius):
+        d2 = ((self.points - np.asarray(point, dtype=float)) ** 2).sum(axis=1)
+        return np.flatnonzero(d2 < radius * radius)
+
+
+class GridIndex(LinearIndex):
+    """
+    Bucketed uniform grid sized from the workspace bounds.
+
+    Nearest queries search rings of cells around the query cell and stop as
+    soon as the searched block of cells is guaranteed to hold the nearest
+    point. Points (and queries) outside the bounds are clamped onto the grid;
+    clamping never increases distances, so the stopping bound stays valid.
+    When the cells to probe would cost more than a vectorised pass over all
+    points (samples far away from a small tree), the query falls back to a
+    linear scan.
+
+    The grid starts coarse and is rebuilt with half the cell size whenever
+    a bucket grows beyond `bucket_size` points, down to `min_cell_size`.
+    Trees concentrate where they grow, so this follows the local density
+    and keeps both nearest and radius queries flat as the tree grows.
+    """
+
+    def __init__(self, min_x, max_x, min_y, max_y, min_z, max_z,
+                 capacity=1024, resolution=4, bucket_size=16, min_cell_size=None, linear_below=1024):
+        super().__init__(min_x, max_x, min_y, max_y, min_z, max_z, capacity)
+        self._lo = (min_x, min_y, min_z)
+        self._hi = (max_x, max_y, max_z)
+        extent = max(max_x - min_x, max_y - min_y, max_z - min_z, 1e-9)
+        self.bucket_size = bucket_size
+        self.linear_below = linear_below
+        self.min_cell_size = min_cell_size if min_cell_size is not None else extent / 256
+        self._rebuild(extent / resolution)
+
+    def _rebuild(self, cell_size):
+        self.cell_size = cell_size
+        self._shape = tuple(max(int(math.ceil((h - l) / cell_size)), 1)
+                            for l, h in zip(self._lo, self._hi))
+        self._max_ring = max(self._shape)
+        # Keys live in a padded index space so that ring offsets can be added
+        # to a key directly without wrapping into a neighbouring row.
+        self._pad = self._max_ring + 1
+        self._stride = max(self._shape) + 2 * self._pad
+        self._rings = {}
+        self._buckets = {}
+        live = np.flatnonzero(np.isfinite(self.points[:, 0]))
+        if len(live) == 0:
+            return
+        lo = np.array(self._lo)
+        cells = np.clip(((self.points[live] - lo) / cell_size).astype(np.intp), 0, np.array(self._shape) - 1)
+        keys = self._key(cells.T)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        order = live[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for key, bucket in zip(keys[starts].tolist(), np.split(order, starts[1:])):
+            self._buckets[key] = bucket.tolist()
+
+    def _cell(self, point):
+        cell = []
+        for c, l, n in zip(point, self._lo, self._shape):
+            i = int((c - l) / self.cell_size) if c > l else 0
+            cell.append(i if i < n else n - 1)
+        return cell
+
+    def _key(self, cell):
+        p, s = self._pad, self._stride
+        return (cell[0] + p) + s * ((cell[1] + p) + s * (cell[2] + p))
+
+    def _ring(self, r):
+        # Key offsets of all cells at Chebyshev distance exactly r, cached per r.
+        offsets = self._rings.get(r)
+        if offsets is None:
+            axis = np.arange(-r, r + 1)
+            grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+            grid = grid[np.abs(grid).max(axis=1) == r]
+            offsets = (grid[:, 0] + self._stride * (grid[:, 1] + self._stride * grid[:, 2])).tolist()
+            self._rings[r] = offsets
+        return offsets
+
+    def insert(self, point):
+        i = super().insert(point)
+        key = self._key(self._cell(point))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [i]
+        else:
+            bucket.append(i)
+            if len(bucket) > self.bucket_size and self.cell_size / 2 >= self.min_cell_size:
+                self._rebuild(self.cell_size / 2)
+        return i
+
+    def remove(self, i):
+        key = self._key(self._cell(self.point(i)))
+        bucket = self._buckets[key]
+        bucket.remove(i)
+        if not bucket:
+            del self._buckets[key]
+        super().remove(i)
+
+    def _gather(self, key, r):
+        buckets = self._buckets
+        found = []
+        for offset in self._ring(r):
+            bucket = buckets.get(key + offset)
+            if bucket is not None:
+                found += bucket
+        return found
+
+    def _clearance(self, q, cell, r):
+        # Distance from q to the nearest grid cell outside the block of
+        # rings 0..r. Sides of the block that touch the grid edge are closed.
+        bound = math.inf
+        for c, i, l, n in zip(q, cell, self._lo, self._shape):
+            if i - r > 0:
+                bound = min(bound, c - (l + (i - r) * self.cell_size))
+            if i + r < n - 1:
+                bound = min(bound, l + (i + r + 1) * self.cell_size - c)
+        return bound
+
+    def _probe_budget(self):
+        # Below `linear_below` points a single vectorised pass beats the
+        # per-ring overhead outright. Above it, a dict probe costs roughly as
+        # much as sixteen points of the vectorised pass.
+        if self._size < self.linear_below:
+            return -1
+        return self._size // 16 + 64
+
+    def nearest(self, point):
+        q = [min(max(c, l), h) for c, l, h in zip(point, self._lo, self._hi)]
+        cell = self._cell(q)
+        key = self._key(cell)
+        candidates = []
+        budget = self._probe_budget()
+        for r in range(self._max_ring + 1):
+            budget -= len(self._ring(r))
+            if budget < 0:
+                return super().nearest(point)
+            candidates += self._gather(key, r)
+            if candidates:
+                bound = self._clearance(q, cell, r)
+                d2 = ((self._xyz[candidates] - point) ** 2).sum(axis=1)
+                k = int(np.argmin(d2))
+                if d2[k] <= bound * bound:
+                    return candidates[k]
+        return candidates[k]
+
+    def within(self, point, radius):
+        cell = self._cell([min(max(c, l), h) for c, l, h in zip(point, self._lo, self._hi)])
+        key = self._key(cell)
+        rings = min(int(math.ceil(radius / self.cell_size)), self._max_ring)
+        if sum(len(self._ring(r)) for r in range(rings + 1)) > self._probe_budget():
+            return super().within(point, radius)
+        candidates = []
+        for r in range(rings + 1):
+            candidates += self._gather(key, r)
+        candidates = np.array(candidates, dtype=np.intp)
+        d2 = ((self._xyz[candidates] - np.asarray(point, dtype=float)) ** 2).sum(axis=1)
+        return np.sort(candidates[d2 < radius * radius])
@@ -0,0 +1,109 @@
+import time
+
+# ----------------------------
+#  Per-run planner statistics
+# ----------------------------
+# Planners fill in a PlanStats passed as `stats` when they return. With the
+# default stats=None nothing is recorded.
+#
+# Profiling (profile=True on the planners) additionally times every phase of
+# the loop. The planners call their phases through local names; only when
+# profiling are those names bound to timing wrappers, so the normal path runs
+# the exact same calls as without stats.
+
+
+class PlanStats:
+    """
+    Counters of one planning run: `iterations` is the number of samples
+    drawn, `tree_size` the number of nodes (over all trees) at the end and
+    `first_solution` the iteration that first reached the goal (None if it
+    never did).
+
+    When profiling, `phases` maps each phase name to [calls, nanoseconds],
+    `collision_checks` counts the segments actually tested (cache hits are
+    free) and `total_ns` is the time of the whole call.
+    """
+
+    def __init__(self):
+        self.profile = False
+        self.iterations = 0
+        self.tree_size = 0
+        self.first_solution = None
+        self.collision_checks = None
+        self.total_ns = None
+        self.phases = {}
+        self._t0 = None
+
+    def start(self):
+        """
+        Switch profiling on and start the clock for `total_ns`.
+        """
+        self.profile = True
+        self.collision_checks = 0
+        self._t0 = time.perf_counter_ns()
+
+    def timed(self, name, fn):
+        """
+        `fn` wrapped to add its calls and time to phase `name`.
+        """
+        entry = self.phases.setdefault(name, [0, 0])
+        clock = time.perf_counter_ns
+
+        def wrapper(*args):
+            t0 = clock()
+            result = fn(*args)
+            entry[1] += clock() - t0
+            entry[0] += 1
+            return result
+        return wrapper
+
+    def solved(self, sampler):
+        if self.first_solution is None:
+            self.first_solution = sampler.count
+
+    def finish(self, sampler, *trees):
+        self.iterations = sampler.count
+        self.tree_size = sum(len(tree) for tree in trees)
+        if self.profile:
+            self.total_ns = time.perf_counter_ns() - self._t0
+
+    @property
+    def checks_per_node(self):
+        """
+        Segments tested per node added to the tree (roots excluded).
+        """
+        if self.collision_checks is None or self.tree_size <= 1:
+            return None
+        return self.collision_checks / (self.tree_size - 1)
+
+    def as_dict(self):
+        out = {k: v for k, v in vars(self).items() if not k.startswith('_')}
+        out['checks_per_node'] = self.checks_per_node
+        return out
+
+    def __str__(self):
+        lines = [f"iterations {self.iterations}, tree size {self.tree_size}, "
+                 f"first solution at {self.first_solution}"]
+        if self.profile:
+            per_node = self.checks_per_node
+            lines.append(f"collision checks {self.collision_checks}"
+                         + ("" if per_node is None else f" ({per_node:.2f} per node)"))
+            total = self.total_ns or 1
+            for name, (calls, ns) in self.phases.items():
+                lines.append(f"  {name:14s} {calls:8d} calls {ns / 1e6:10.2f} ms {100 * ns / total:5.1f}%")
+            lines.append(f"  {'total':14s} {'':8s}       {total / 1e6:10.2f} ms")
+        return "\n".join(lines)
+
+
+def phase_timer(stats):
+    """
+    Binder for the planner phases: `timed(name, fn)` when `stats` profiles,
+    otherwise a no-op that hands back `fn` itself.
+    """
+    if stats is None or not stats.profile:
+        return _untimed
+    return stats.timed
+
+
+def _untimed(name, fn):
+    return fn
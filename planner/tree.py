@@ -0,0 +1,128 @@
+import numpy as np
+
+from planner.spatial_index import GridIndex
+
+# ---------------------------------------
+#  Array-backed tree shared by the planners
+# ---------------------------------------
+# Nodes are plain integer indices. Coordinates live in the spatial index
+# (which needs them for its queries anyway), parent indices and costs in
+# growable arrays next to it. The root has parent -1. Children are kept as
+# intrusive linked lists (first_child / next_sibling) so a rewire can reach
+# the subtree below a node without scanning the whole tree.
+
+
+class Tree:
+    def __init__(self, root, min_x, max_x, min_y, max_y, min_z, max_z,
+                 spatial_index=GridIndex, capacity=1024):
+        self.index = spatial_index(min_x, max_x, min_y, max_y, min_z, max_z, capacity=capacity)
+        self.parent = np.empty(capacity, dtype=np.intp)
+        self.cost = np.empty(capacity)
+        self.first_child = np.empty(capacity, dtype=np.intp)
+        self.next_sibling = np.empty(capacity, dtype=np.intp)
+        self.add(root, -1, 0.0)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def xyz(self):
+        return self.index.points
+
+    def add(self, point, parent, cost=0.0):
+        i = self.index.insert(point)
+        if i == len(self.parent):
+            self.parent = np.concatenate([self.parent, np.empty_like(self.parent)])
+            self.cost = np.concatenate([self.cost, np.empty_like(self.cost)])
+            self.first_child = np.concatenate([self.first_child, np.empty_like(self.first_child)])
+            self.next_sibling = np.concatenate([self.next_sibling, np.empty_like(self.next_sibling)])
+        self.cost[i] = cost
+        self.first_child[i] = -1
+        self._link(i, parent)
+        return i
+
+    def _link(self, i, parent):
+        self.parent[i] = parent
+        if parent >= 0:
+            self.next_sibling[i] = self.first_child[parent]
+            self.first_child[parent] = i
+        else:
+            self.next_sibling[i] = -1
+
+    def _unlink(self, i):
+        parent = self.parent[i]
+        if parent < 0:
+            return
+        child = self.first_child[parent]
+        if child == i:
+            self.first_child[parent] = self.next_sibling[i]
+            return
+        while child >= 0:
+            following = self.next_sibling[child]
+            if following == i:
+                self.next_sibling[child] = self.next_sibling[i]
+                return
+            child = following
+
+    def subtree(self, i):
+        """
+        Indices of node `i` and all of its descendants, breadth first.
+        """
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        nodes = [i]
+        k = 0
+        while k < len(nodes):
+            child = first_child[nodes[k]]
+            while child >= 0:
+                nodes.append(child)
+                child = next_sibling[child]
+            k += 1
+        return nodes
+
+    def reparent(self, i, parent, cost):
+        """
+        Move node `i` under `parent` with cost `cost`. The cost change is
+        pushed down to every descendant, so `cost` stays exact after rewiring.
+        """
+        delta = cost - self.cost[i]
+        self._unlink(i)
+        self._link(i, parent)
+        self.cost[self.subtree(i)] += delta
+
+    def prune(self, i):
+        """
+        Remove node `i` and all of its descendants; returns their indices.
+        The indices are not reused: removed nodes get parent -1 and an
+        infinite cost, and the spatial index never returns them again.
+        """
+        nodes = self.subtree(i)
+        self._unlink(i)
+        for j in nodes:
+            self.index.remove(j)
+        self.parent[nodes] = -1
+        self.cost[nodes] = np.inf
+        self.first_child[nodes] = -1
+        self.next_sibling[nodes] = -1
+        return nodes
+
+    def point(self, i):
+        return self.index.point(i)
+
+    def nearest(self, point):
+        return self.index.nearest(point)
+
+    def within(self, point, radius):
+        return self.index.within(point, radius)
+
+    def path_to(self, i):
+        """
+        Indices from the root to node `i`, following the parent array.
+        """
+        indices = []
+        parent = self.parent
+        while i >= 0:
+            indices.append(i)
+            i = parent[i]
+        indices.reverse()
+        return indices
@@ -1,17 +1,9 @@
-from planner.rrt_3d_planner import rrt_planning
-from plotting.plot_rrt_3d import plot_rrt_3d
-from plotting.plot_rrt_3d_interactive import plot_rrt_3d_interactive
-
+import argparse
 
- # this is a function to load coordinates from text files
-def readAndConvertCoordinates(fileName):
-    obs = []
-    with open(fileName, 'r') as file:
-        for line in file:
-            line = line.strip().strip('()')
-            x, y, z = map(float, line.split(","))
-            obs.append((x-0.5, x+0.5, y-0.5, y+0.5, z-0.5, z+0.5))
-    return obs
+from coordinate_io import points_to_boxes, read_points, write_points
+from planner.path_smoothing import simplify_path
+from planner.plan_cache import PlanCache, plan_key
+from planner.rrt_3d_planner import rrt_planning
 
 
 # Define parameters
@@ -22,9 +14,6 @@ min_x, max_x = -1.0, 7.0
 min_y, max_y = -1.0, 7.0
 min_z, max_z = 0.5, 8.0
 
-# load the locations for the obstalces from txt file
-obstacles = readAndConvertCoordinates("obsLocationRandom.txt")
-
 # obstacles = [
 #    (2.0, 3.0, -0.5, 0.5, 4.5, 5.5),
 #    (5.0, 4.0, -0.5, 0.5, 4.5, 3.5),
@@ -33,38 +22,83 @@ obstacles = readAndConvertCoordinates("obsLocationRandom.txt")
 #     (2.0, 3.0, -2.0, -1.0, 4.5, 5.5),
 #  ]
 
-# Run RRT
-path = rrt_planning(
-        start=start_coord,
-        goal=end_coord,
-        obstacles=obstacles,
-        min_x=min_x, max_x=max_x,
-        min_y=min_y, max_y=max_y,
-        min_z=min_z, max_z=max_z,
-        expand_dist=0.1,
-        goal_sample_rate=0.05,
-        max_iter=10000,
-        goal_tolerance=0.05
-    )
-
-if path is not None:
-    print("Path found")
-    #for waypoint in path:
-       #print(waypoint)
-            
-    # deletes all the old waypoints from the file and then 
-    # adds all the new waypoints to the "route.txt" file
-    with open("route.txt", "w") as file:
-        for waypoint in path:
-            file.write(f"{waypoint}\n")
-        
-    print("Click plot away to continue")
-    # Plot with matplotlib
-    plot_rrt_3d(path, start_coord, end_coord, obstacles,
-                    min_x, max_x, min_y, max_y, min_z, max_z)
-
-    # Plot interactively with plotly
-    #plot_rrt_3d_interactive(path, start_coord, end_coord, obstacles,
-    #                            min_x, max_x, min_y, max_y, min_z, max_z)
-else:
-    print("No path found after maximum iterations.")
+
+rrt_params = dict(expand_dist=0.1,
+                  goal_sample_rate=0.05,
+                  max_iter=10000,
+                  goal_tolerance=0.05)
+smoothing_params = dict(clearance=0.1, iterations=200, seed=0)
+
+
+# plan a route trough the obstacles, returns None if no path is found.
+# this is also used by scenario_farm.py to plan many routes in a row.
+# with a PlanCache a route that was planned before for the same obstacles,
+# parameters and seed is read from the cache instead
+def planRoute(obstacles, seed=None, cache=None):
+    def plan():
+        # Run RRT
+        path = rrt_planning(
+                start=start_coord,
+                goal=end_coord,
+                obstacles=obstacles,
+                min_x=min_x, max_x=max_x,
+                min_y=min_y, max_y=max_y,
+                min_z=min_z, max_z=max_z,
+                seed=seed,
+                **rrt_params
+            )
+
+        # shortcut the path and drop redundant waypoints, so the drone only
+        # has to fly to (and the simulation only has to load) the corners
+        return simplify_path(path, obstacles, **smoothing_params)
+
+    if cache is None:
+        return plan()
+    key = plan_key(obstacles, start_coord, end_coord,
+                   (min_x, max_x, min_y, max_y, min_z, max_z),
+                   {'planner': 'rrt_planning', 'rrt': rrt_params, 'smoothing': smoothing_params},
+                   seed)
+    # an unseeded failure is just one unlucky run, so it is not remembered
+    return cache.lookup(key, plan, cache_failures=seed is not None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Plan a route trough the obstacles in obsLocationRandom.txt')
+    parser.add_argument('--seed',           default=None,   type=int,   help='Seed of the planner, None is random (default: None)', metavar='')
+    parser.add_argument('--no_cache',       action='store_true',        help='Always plan, do not read or write the plan cache')
+    parser.add_argument('--clear_cache',    action='store_true',        help='Empty the plan cache before planning')
+    ARGS = parser.parse_args()
+
+    from plotting.plot_rrt_3d import plot_rrt_3d
+    from plotting.plot_rrt_3d_interactive import plot_rrt_3d_interactive
+
+    # load the locations for the obstalces from txt file and turn
+    # them into 1x1x1 boxes around those locations
+    obstacles = points_to_boxes(read_points("obsLocationRandom.txt"))
+
+    cache = PlanCache(enabled=not ARGS.no_cache)
+    if ARGS.clear_cache:
+        cache.invalidate()
+    path = planRoute(obstacles, seed=ARGS.seed, cache=cache)
+    if cache.hits:
+        print("Route taken from the plan cache (use --no_cache to plan again)")
+
+    if path is not None:
+        print(f"Path found, {len(path)} waypoints")
+        #for waypoint in path:
+           #print(waypoint)
+
+        # deletes all the old waypoints from the file and then
+        # adds all the new waypoints to the "route.txt" file
+        write_points("route.txt", path)
+
+        print("Click plot away to continue")
+        # Plot with matplotlib
+        plot_rrt_3d(path, start_coord, end_coord, obstacles,
+                        min_x, max_x, min_y, max_y, min_z, max_z)
+
+        # Plot interactively with plotly
+        #plot_rrt_3d_interactive(path, start_coord, end_coord, obstacles,
+        #                            min_x, max_x, min_y, max_y, min_z, max_z)
+    else:
+        print("No path found after maximum iterations.")
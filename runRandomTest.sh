@@ -1,13 +1,5 @@
 #!/bin/bash
 
-# Reset starting coordinates for "goalCoordinates.txt"
-echo "reset coordinates"
-cat <<EOL > goalCoordinates.txt
-0.0
-0.0
-1.0
-EOL
-
 # Generate positions of obstacles
 echo "Placing obstacles on random positions"
 python3 generateRandomObstacles.py
@@ -0,0 +1,171 @@
+"""Batch runner for complete missions: generate, plan, fly and score.
+
+Every scenario does what runRandomTest.sh does, without plots and without a
+second terminal: random obstacles as in generateRandomObstacles.py, a route
+from rrt_example_1.planRoute, and a headless flight of that route with
+CtrlAviary and DSLPIDControl through pid_one_drone.run(follow_route=True).
+Scenarios run in a process pool; every worker process has its own PyBullet
+DIRECT client (gui=False), so flights do not interfere.
+
+Example
+-------
+    $ python3 scenario_farm.py --scenarios 200 --obstacles 15
+
+Each scenario gets its own folder under --output_folder with its obstacle
+file, route and flight logs, and the summary is written to results.json
+there. A scenario ends as one of: success (last waypoint reached), crash
+(hit an obstacle or the ground), timeout (still flying after
+--duration_sec), no_path (planning failed) or error (an exception).
+
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import time
+import traceback
+from datetime import datetime
+from multiprocessing import Pool
+
+import numpy as np
+
+from planner.sampling import spawn_seeds
+
+DEFAULT_SCENARIOS = 100
+DEFAULT_OBSTACLES = 15
+DEFAULT_SEED = 0
+DEFAULT_DURATION_SEC = 120
+DEFAULT_OUTPUT_FOLDER = 'results/farm'
+OUTCOMES = ('success', 'crash', 'timeout', 'no_path', 'error')
+
+
+def runScenario(task):
+    # one complete mission; `task` is (scenario number, seed, settings)
+    k, seed, settings = task
+    folder = os.path.join(settings['folder'], f"scenario-{k:04d}")
+    os.makedirs(folder, exist_ok=True)
+    result = {'scenario': k, 'seed': [int(seed.entropy), list(seed.spawn_key)],
+              'outcome': 'error', 'plan_time_sec': None, 'waypoints': None,
+              'flight_sim_time_sec': None, 'flight_wall_time_sec': None}
+    try:
+        # imported here so the pool's parent process never loads PyBullet
+        from generateRandomObstacles import generateObstacles, writeObstacles
+        from coordinate_io import points_to_boxes, read_points, write_points
+        from rrt_example_1 import planRoute
+        import pid_one_drone
+
+        planSeed, obstacleSeed = seed.spawn(2)
+        # the generated files are only read by programs, so use the
+        # binary format (see coordinate_io.py)
+        obstacleFile = os.path.join(folder, "obsLocationRandom.npy")
+        routeFile = os.path.join(folder, "route.npy")
+
+        #### Generate ##########################################
+        rng = random.Random(int(obstacleSeed.generate_state(1)[0]))
+        # rounded like the text obstacle file, so that plan and flight see
+        # the same obstacles as in runRandomTest.sh
+        writeObstacles(np.round(generateObstacles(settings['obstacles'], rng), 2), obstacleFile)
+
+        #### Plan ##############################################
+        start = time.perf_counter()
+        path = planRoute(points_to_boxes(read_points(obstacleFile)), seed=planSeed)
+        result['plan_time_sec'] = time.perf_counter() - start
+        if path is None:
+            result['outcome'] = 'no_path'
+            return result
+        result['waypoints'] = len(path)
+        write_points(routeFile, path)
+
+        #### Fly ###############################################
+        with contextlib.redirect_stdout(io.StringIO()):
+            flight = pid_one_drone.run(gui=False,
+                                       plot=False,
+                                       user_debug_gui=False,
+                                       record_video=False,
+                                       duration_sec=settings['duration_sec'],
+                                       output_folder=folder,
+                                       follow_route=True,
+                                       route_file=routeFile,
+                                       obstacle_file=obstacleFile,
+                                       stream_log=True)
+        result['flight_sim_time_sec'] = flight['sim_time_sec']
+        result['flight_wall_time_sec'] = flight['wall_time_sec']
+        if flight['route_done']:
+            result['outcome'] = 'success'
+        elif flight['crashed']:
+            result['outcome'] = 'crash'
+        else:
+            result['outcome'] = 'timeout'
+    except Exception:
+        result['error'] = traceback.format_exc()
+    return result
+
+
+def summarize(results):
+    # rates of every outcome plus plan and flight time statistics
+    def stats(values):
+        if not values:
+            return None
+        return {'mean': float(np.mean(values)), 'median': float(np.median(values)),
+                'p95': float(np.percentile(values, 95))}
+
+    count = len(results)
+    success = [r for r in results if r['outcome'] == 'success']
+    return {
+        'scenarios': count,
+        'rates': {o: sum(r['outcome'] == o for r in results) / max(count, 1) for o in OUTCOMES},
+        'plan_time_sec': stats([r['plan_time_sec'] for r in results if r['plan_time_sec'] is not None]),
+        'flight_sim_time_sec': stats([r['flight_sim_time_sec'] for r in success]),
+        'flight_wall_time_sec': stats([r['flight_wall_time_sec'] for r in success]),
+        'waypoints': stats([r['waypoints'] for r in results if r['waypoints'] is not None]),
+    }
+
+
+def runFarm(scenarios=DEFAULT_SCENARIOS,
+            obstacles=DEFAULT_OBSTACLES,
+            seed=DEFAULT_SEED,
+            duration_sec=DEFAULT_DURATION_SEC,
+            processes=None,
+            output_folder=DEFAULT_OUTPUT_FOLDER):
+    folder = os.path.join(output_folder, 'farm-' + datetime.now().strftime("%m.%d.%Y_%H.%M.%S"))
+    os.makedirs(folder, exist_ok=True)
+    settings = {'folder': folder, 'obstacles': obstacles, 'duration_sec': duration_sec}
+    tasks = [(k, s, settings) for k, s in enumerate(spawn_seeds(seed, scenarios))]
+
+    start = time.perf_counter()
+    results = []
+    # a fresh worker per scenario keeps PyBullet state from leaking between flights
+    with Pool(processes, maxtasksperchild=1) as pool:
+        from tqdm import tqdm
+        for result in tqdm(pool.imap_unordered(runScenario, tasks), total=len(tasks), desc="Running scenarios"):
+            results.append(result)
+    results.sort(key=lambda r: r['scenario'])
+
+    report = {'config': {'scenarios': scenarios, 'obstacles': obstacles, 'seed': seed,
+                         'duration_sec': duration_sec, 'wall_time_sec': time.perf_counter() - start},
+              'summary': summarize(results),
+              'results': results}
+    with open(os.path.join(folder, 'results.json'), 'w') as file:
+        json.dump(report, file, indent=1)
+    return report, folder
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate, plan and fly many random scenarios in parallel')
+    parser.add_argument('--scenarios',      default=DEFAULT_SCENARIOS,     type=int, help='Number of scenarios (default: 100)', metavar='')
+    parser.add_argument('--obstacles',      default=DEFAULT_OBSTACLES,     type=int, help='Obstacles per scenario (default: 15)', metavar='')
+    parser.add_argument('--seed',           default=DEFAULT_SEED,          type=int, help='Root seed, scenario k always gets the same world and plan (default: 0)', metavar='')
+    parser.add_argument('--duration_sec',   default=DEFAULT_DURATION_SEC,  type=int, help='Simulated seconds before a flight times out (default: 120)', metavar='')
+    parser.add_argument('--processes',      default=None,                  type=int, help='Worker processes (default: all cores)', metavar='')
+    parser.add_argument('--output_folder',  default=DEFAULT_OUTPUT_FOLDER, type=str, help='Folder for the scenario files and results (default: "results/farm")', metavar='')
+    ARGS = parser.parse_args()
+
+    report, folder = runFarm(**vars(ARGS))
+    summary = report['summary']
+    print("Outcomes:", ", ".join(f"{o} {summary['rates'][o]:.1%}" for o in OUTCOMES))
+    for key in ('plan_time_sec', 'flight_sim_time_sec', 'flight_wall_time_sec'):
+        if summary[key] is not None:
+            print(f"{key}: mean {summary[key]['mean']:.2f}, median {summary[key]['median']:.2f}, p95 {summary[key]['p95']:.2f}")
+    print("Results written to", os.path.join(folder, 'results.json'))
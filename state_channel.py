@@ -0,0 +1,114 @@
+"""Shared-memory channel between pid_one_drone.py and droneController.py.
+
+Replaces the exchange through "currentCoordinates.txt" and
+"goalCoordinates.txt". Both processes map the same small file (in /dev/shm
+when available, so it never touches the disk) with a fixed layout of two
+records, the current pose written by the simulation and the target waypoint
+written by the controller:
+
+    offset  0  uint64   pose sequence number
+    offset  8  float64  pose x, y, z
+    offset 32  uint64   target sequence number
+    offset 40  float64  target x, y, z
+
+Each record is a seqlock: the writer makes its sequence number odd, writes
+the values and makes it even again. A reader retries while the number is odd
+or changed during the read, so it never sees a half-written record, and the
+number tells it whether anything new arrived. Sequence number 0 means the
+record was never written.
+"""
+import mmap
+import os
+import struct
+import time
+
+DEFAULT_PATH = "/dev/shm/projectP-DM-state" if os.path.isdir("/dev/shm") else "droneState.bin"
+
+_RECORD = struct.Struct("<Q3d")
+_POSE = 0
+_TARGET = _RECORD.size
+_SIZE = 2 * _RECORD.size
+
+
+class StateChannel:
+
+    def __init__(self, path=DEFAULT_PATH):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if os.fstat(fd).st_size < _SIZE:
+                os.ftruncate(fd, _SIZE)
+            self._buf = mmap.mmap(fd, _SIZE)
+        finally:
+            os.close(fd)
+        self.path = path
+
+    def reset(self):
+        """Forget both records; done by the simulation when it starts."""
+        self._buf[:] = bytes(_SIZE)
+
+    def close(self):
+        self._buf.close()
+
+    #### Writers ###############################################
+    def write_pose(self, xyz):
+        self._write(_POSE, xyz)
+
+    def write_target(self, xyz):
+        self._write(_TARGET, xyz)
+
+    def _write(self, offset, xyz):
+        seq = struct.unpack_from("<Q", self._buf, offset)[0]
+        struct.pack_into("<Q", self._buf, offset, seq + 1)
+        struct.pack_into("<3d", self._buf, offset + 8, *xyz[:3])
+        struct.pack_into("<Q", self._buf, offset, seq + 2)
+
+    #### Readers ###############################################
+    def read_pose(self):
+        """(seq, (x, y, z)) of the latest pose, or (0, None) if there is none yet."""
+        return self._read(_POSE)
+
+    def read_target(self):
+        """(seq, (x, y, z)) of the latest target, or (0, None) if there is none yet."""
+        return self._read(_TARGET)
+
+    def _read(self, offset, deadline=None):
+        # A write takes microseconds, so retry at once a few times, then back
+        # off like _wait: a writer that stopped halfway (a killed process)
+        # must not keep the reader spinning past the caller's deadline.
+        delay = 0.0
+        while True:
+            seq, x, y, z = _RECORD.unpack_from(self._buf, offset)
+            if not seq & 1 and struct.unpack_from("<Q", self._buf, offset)[0] == seq:
+                return seq, (None if seq == 0 else (x, y, z))
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"record at offset {offset} of {self.path} stayed mid-update")
+            if delay:
+                time.sleep(delay)
+            delay = min(max(delay * 2, 5e-5), 1e-3)
+
+    def wait_pose(self, after_seq=0, timeout=None):
+        """Block until a pose other than number `after_seq` is published, or
+        `timeout` seconds passed; returns (seq, (x, y, z)) like read_pose.
+        Raises TimeoutError if the record is still half-written by then."""
+        return self._wait(_POSE, after_seq, timeout)
+
+    def wait_target(self, after_seq=0, timeout=None):
+        """Same as wait_pose, for the target."""
+        return self._wait(_TARGET, after_seq, timeout)
+
+    def _wait(self, offset, after_seq, timeout):
+        # The processes are started independently, so there is no shared
+        # lock or condition to block on; sleep with a short backoff (up to
+        # 1 ms) between checks instead of spinning on the buffer.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 5e-5
+        while True:
+            seq, xyz = self._read(offset, deadline)
+            # Compared for inequality, so a restarted simulation (numbers
+            # starting over from 0) still counts as new data.
+            if seq != 0 and seq != after_seq:
+                return seq, xyz
+            if deadline is not None and time.monotonic() > deadline:
+                return seq, xyz
+            time.sleep(delay)
+            delay = min(delay * 2, 1e-3)
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from planner.occupancy import OccupancyGrid, occupancy_grid
+
+OBSTACLES = [(2.0, 3.0, 2.0, 3.0, 2.0, 3.0)]
+BOUNDS = (0.0, 5.0, 0.0, 5.0, 0.0, 5.0)
+
+
+def test_cache_file_without_npz_suffix_is_reused(tmp_path):
+    cache_file = str(tmp_path / "grid.cache")
+    first = occupancy_grid(OBSTACLES, *BOUNDS, resolution=0.25, cache_file=cache_file)
+    assert os.listdir(tmp_path) == ["grid.cache"]
+    second = occupancy_grid(OBSTACLES, *BOUNDS, resolution=0.25, margin=0.2, cache_file=cache_file)
+    assert second is not first
+    assert (second.sdf == first.sdf).all()
+    assert second.margin == 0.2
+
+
+def test_margin_must_be_below_max_distance():
+    with pytest.raises(ValueError):
+        OccupancyGrid(OBSTACLES, *BOUNDS, resolution=0.25, margin=1.0, max_distance=1.0)
+    with pytest.raises(ValueError):
+        occupancy_grid(OBSTACLES, *BOUNDS, resolution=0.25, margin=2.0)
+    assert occupancy_grid(OBSTACLES, *BOUNDS, resolution=0.25, margin=2.0, max_distance=None).margin == 2.0
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+from planner.prm import prm_roadmap
+
+OBSTACLES = [(2.0, 3.0, 2.0, 3.0, 2.0, 3.0)]
+BOUNDS = (-1.0, 7.0, -1.0, 7.0, 0.5, 8.0)
+
+
+def test_generator_seed_builds_and_is_never_reused(tmp_path):
+    cache_file = str(tmp_path / "roadmap.npz")
+    first = prm_roadmap(OBSTACLES, *BOUNDS, num_samples=300, seed=np.random.default_rng(0),
+                        cache_file=cache_file)
+    assert len(first) > 0
+    assert first.query((0.0, 0.0, 1.0), (6.0, 6.0, 7.0)) is not None
+    # a Generator cannot be compared with the one the file was built with
+    second = prm_roadmap(OBSTACLES, *BOUNDS, num_samples=300, seed=np.random.default_rng(0),
+                         cache_file=cache_file)
+    assert second is not first
+    assert not second.matches(OBSTACLES, *BOUNDS, num_samples=300, seed=np.random.default_rng(0))
+
+
+def test_int_seed_reuses_the_saved_roadmap(tmp_path):
+    cache_file = str(tmp_path / "roadmap.cache")
+    first = prm_roadmap(OBSTACLES, *BOUNDS, num_samples=300, seed=1, cache_file=cache_file)
+    second = prm_roadmap(OBSTACLES, *BOUNDS, num_samples=300, seed=1, cache_file=cache_file)
+    assert os.listdir(tmp_path) == ["roadmap.cache"]
+    assert second is not first
+    assert np.array_equal(first.points, second.points)
+    assert second.matches(OBSTACLES, *BOUNDS, num_samples=300, seed=1)
+    assert not second.matches(OBSTACLES, *BOUNDS, num_samples=300, seed=2)